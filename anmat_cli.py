@@ -0,0 +1,360 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+ANMAT Vademecum - Línea de comandos unificada
+
+Subcomandos: crawl, resume, refresh, probe, export, diff, stats, normalize.
+Selenium y Chrome sólo se cargan en los subcomandos que abren el navegador
+(crawl, resume, refresh y probe); el resto arranca sin importarlos.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+from collections import Counter
+
+
+# Configuración compartida por todos los subcomandos.
+# Puede sobrescribirse con un archivo anmat_config.json en el directorio actual.
+CONFIG_FILE = 'anmat_config.json'
+CONFIG_DEFAULT = {
+    'laboratorios_file': 'LaboratoriosANMAT.txt',
+    'output_file': 'medicamentos_anmat_completo.csv',
+    'progress_file': 'anmat_progreso.txt',
+    'snapshots_dir': 'snapshots',
+    'headless': True,
+    'delay': 0.5,
+    'capture_network': False,
+    'tabs': 1,
+    'sqlite_file': None,
+}
+
+# Código de salida de crawl/resume cuando quedan laboratorios por procesar
+EXIT_INCOMPLETO = 3
+
+# Código de salida cuando la estructura de la página cambió (no tiene sentido reintentar)
+EXIT_SELECTORES = 4
+
+
+def load_config(config_file=CONFIG_FILE):
+    """Combina la configuración por defecto con el archivo de configuración, si existe"""
+    config = dict(CONFIG_DEFAULT)
+    if os.path.exists(config_file):
+        with open(config_file, 'r', encoding='utf-8') as f:
+            config.update(json.load(f))
+    return config
+
+
+def _build_scraper(args, append=False):
+    """Crea el scraper V2 (importa selenium recién acá)"""
+    if args.tabs > 1:
+        from anmat_multitab import ANMATScraperMultiTab
+
+        if args.capture_network:
+            print("Aviso: el modo multi-pestaña extrae del DOM (se ignora --capture-network)")
+        return ANMATScraperMultiTab(
+            laboratorios_file=args.laboratorios_file,
+            output_file=args.output_file,
+            headless=args.headless,
+            delay=args.delay,
+            tabs=args.tabs,
+            append=append,
+            progress_file=args.progress_file,
+            sqlite_file=args.sqlite_file
+        )
+
+    from anmat_scraper_v2 import ANMATScraperV2
+
+    return ANMATScraperV2(
+        laboratorios_file=args.laboratorios_file,
+        output_file=args.output_file,
+        headless=args.headless,
+        delay=args.delay,
+        capture_network=args.capture_network,
+        append=append,
+        progress_file=args.progress_file,
+        sqlite_file=args.sqlite_file
+    )
+
+
+def _con_navegador(cmd):
+    """Envuelve un subcomando con navegador: aborta sin reintentos si la página cambió"""
+    def wrapper(args):
+        from anmat_selectores import SelectorDriftError
+
+        try:
+            return cmd(args)
+        except SelectorDriftError as e:
+            print(f"\n[ERROR] {e}")
+            return EXIT_SELECTORES
+    return wrapper
+
+
+def _snapshot(args):
+    """Guarda la salida como snapshot si se pidió con --snapshot"""
+    if not args.snapshot:
+        return
+    from anmat_snapshots import AlmacenSnapshots
+
+    snapshot_id = AlmacenSnapshots(args.snapshots_dir).guardar(args.output_file)
+    print(f"Snapshot guardado: {snapshot_id}")
+
+
+def cmd_crawl(args):
+    """Ejecuta un crawl completo desde cero"""
+    if args.estrategias and (args.max_labs or args.start_from):
+        print("[ERROR] --max-labs y --start-from no se aplican con --estrategias")
+        return 1
+
+    if os.path.exists(args.progress_file):
+        os.remove(args.progress_file)
+
+    # El scraper trunca la salida: la anterior se conserva para sembrar el planificador
+    seeds = []
+    if args.estrategias and os.path.exists(args.output_file):
+        root, ext = os.path.splitext(args.output_file)
+        anterior = f'{root}.anterior{ext}'
+        shutil.copyfile(args.output_file, anterior)
+        seeds.append(anterior)
+
+    scraper = _build_scraper(args)
+    if args.estrategias:
+        from anmat_estrategias import PlanificadorEstrategias
+
+        completado = PlanificadorEstrategias(scraper, seed_csv_files=seeds).run()
+    else:
+        completado = scraper.run(start_from=args.start_from, max_labs=args.max_labs)
+
+    if completado:
+        _snapshot(args)
+    return 0 if completado else EXIT_INCOMPLETO
+
+
+def siguiente_laboratorio(laboratorios, progress_file):
+    """
+    Laboratorio desde el cual reanudar según el archivo de progreso
+
+    Returns:
+        Nombre del laboratorio siguiente al último procesado, None para empezar
+        desde el principio, o '' si ya se procesaron todos
+    """
+    if not os.path.exists(progress_file):
+        return None
+    with open(progress_file, 'r', encoding='utf-8') as f:
+        ultimo = f.read().strip()
+    if ultimo not in laboratorios:
+        return None
+    idx = laboratorios.index(ultimo)
+    return laboratorios[idx + 1] if idx + 1 < len(laboratorios) else ''
+
+
+def cmd_resume(args):
+    """Reanuda un crawl interrumpido, agregando al archivo de salida existente"""
+    scraper = _build_scraper(args, append=True)
+
+    start_from = args.start_from or siguiente_laboratorio(scraper.laboratorios, args.progress_file)
+    if start_from == '':
+        print("Todos los laboratorios ya fueron procesados")
+        scraper.close()
+        _snapshot(args)
+        return 0
+
+    completado = scraper.run(start_from=start_from, max_labs=args.max_labs)
+    if completado:
+        _snapshot(args)
+    return 0 if completado else EXIT_INCOMPLETO
+
+
+def cmd_refresh(args):
+    """Refresca sólo la disponibilidad de un CSV o snapshot, registrando los cambios"""
+    from anmat_disponibilidad import RefrescoDisponibilidad, cargar_base
+
+    if args.tabs > 1 or args.capture_network:
+        print("Aviso: el refresco usa una sola pestaña y lee del DOM (se ignoran --tabs y --capture-network)")
+    refresco = RefrescoDisponibilidad(
+        cargar_base(args.base or args.output_file, args.snapshots_dir, args.cambios),
+        laboratorios_file=args.laboratorios_file,
+        cambios_file=args.cambios,
+        headless=args.headless,
+        delay=args.delay
+    )
+    completado = refresco.run(start_from=args.start_from, max_labs=args.max_labs)
+    return 0 if completado else EXIT_INCOMPLETO
+
+
+def cmd_probe(args):
+    """Estima cuánto cambió el catálogo con una muestra de laboratorios y, con --ejecutar, actúa"""
+    from anmat_deriva import (ACCION_COMPLETO, ACCION_DELTA, SondaDeriva, imprimir_estimacion,
+                              planificar_sonda, sondear)
+
+    try:
+        plan = planificar_sonda(args.laboratorios_file, args.snapshots_dir, args.muestra, args.semilla)
+    except KeyError as e:
+        print(f"[ERROR] {e.args[0]}: la sonda compara contra el último snapshot (crawl --snapshot)")
+        return 1
+
+    estimacion = sondear(SondaDeriva(args.laboratorios_file, headless=args.headless, delay=args.delay), plan)
+    imprimir_estimacion(plan, estimacion)
+
+    if not args.ejecutar:
+        return 0
+    if estimacion['accion'] == ACCION_COMPLETO:
+        # El crawl completo se guarda como snapshot para la próxima sonda
+        args.snapshot = True
+        return cmd_crawl(args)
+    if estimacion['accion'] == ACCION_DELTA:
+        args.base = plan['snapshot']['id']
+        return cmd_refresh(args)
+    return 0
+
+
+def cmd_export(args):
+    """Exporta un snapshot (por id o "as of" fecha) a CSV"""
+    from anmat_snapshots import AlmacenSnapshots
+
+    filas = AlmacenSnapshots(args.snapshots_dir).reconstruir(args.referencia, args.destino)
+    print(f"{filas} filas escritas en {args.destino}")
+    return 0
+
+
+def cmd_diff(args):
+    """Compara dos CSVs (reconciliación) o dos snapshots (id o fecha)"""
+    if os.path.isfile(args.a) and os.path.isfile(args.b):
+        from anmat_reconciliar import reconciliar, imprimir_reporte
+
+        imprimir_reporte(reconciliar(args.a, args.b))
+    else:
+        from anmat_snapshots import AlmacenSnapshots, imprimir_diff
+
+        imprimir_diff(AlmacenSnapshots(args.snapshots_dir).diff(args.a, args.b))
+    return 0
+
+
+def cmd_stats(args):
+    """Resumen de un CSV de salida, leído en una sola pasada"""
+    from anmat_reconciliar import hash_clave
+    from anmat_registro import clave_producto, leer_csv
+
+    csv_file = args.csv_file or args.output_file
+    filas = 0
+    claves = set()
+    laboratorios = Counter()
+    disponibilidad = Counter()
+
+    for registro in leer_csv(csv_file):
+        filas += 1
+        claves.add(hash_clave(clave_producto(registro)))
+        laboratorios[registro.Laboratorio] += 1
+        disponibilidad[registro.Disponibilidad] += 1
+
+    print("=" * 70)
+    print(f"Archivo: {csv_file}")
+    print(f"Filas: {filas}")
+    print(f"Productos unicos: {len(claves)}")
+    print(f"Laboratorios: {len(laboratorios)}")
+    for estado, cantidad in disponibilidad.most_common():
+        print(f"  {estado or '(vacio)'}: {cantidad}")
+    print("Laboratorios con mas productos:")
+    for laboratorio, cantidad in laboratorios.most_common(10):
+        print(f"  {cantidad:6d}  {laboratorio[:60]}")
+
+    catalogo = os.path.join(args.snapshots_dir, 'catalogo.json')
+    if os.path.exists(catalogo):
+        with open(catalogo, 'r', encoding='utf-8') as f:
+            snapshots = json.load(f)
+        if snapshots:
+            print(f"Snapshots: {len(snapshots)} (ultimo: {snapshots[-1]['fecha']})")
+    print("=" * 70)
+    return 0
+
+
+def cmd_normalize(args):
+    """Normaliza un CSV o snapshot completo en columnas tipadas (importa pandas recién acá)"""
+    from anmat_normalizar import cargar_origen, guardar, normalizar
+
+    df = normalizar(cargar_origen(args.origen or args.output_file, args.snapshots_dir), args.laboratorios_file)
+    guardar(df, args.destino)
+    print(f"{len(df)} filas normalizadas en {args.destino}")
+    return 0
+
+
+def build_parser(config):
+    """Construye el parser con la configuración compartida como valores por defecto"""
+    comun = argparse.ArgumentParser(add_help=False)
+    comun.add_argument('--laboratorios-file', dest='laboratorios_file', default=config['laboratorios_file'])
+    comun.add_argument('--output', dest='output_file', default=config['output_file'])
+    comun.add_argument('--progress-file', dest='progress_file', default=config['progress_file'])
+    comun.add_argument('--snapshots-dir', dest='snapshots_dir', default=config['snapshots_dir'])
+
+    navegador = argparse.ArgumentParser(add_help=False)
+    navegador.add_argument('--headless', dest='headless', action='store_true', default=config['headless'])
+    navegador.add_argument('--no-headless', dest='headless', action='store_false')
+    navegador.add_argument('--delay', type=float, default=config['delay'])
+    navegador.add_argument('--capture-network', action='store_true', default=config['capture_network'])
+    navegador.add_argument('--tabs', type=int, default=config['tabs'],
+                           help="Pestañas simultáneas en un único Chrome (modo multi-pestaña si es mayor a 1)")
+    navegador.add_argument('--start-from', help="Laboratorio desde el cual empezar")
+    navegador.add_argument('--max-labs', type=int, help="Número máximo de laboratorios")
+    navegador.add_argument('--snapshot', action='store_true', help="Guardar la salida como snapshot al terminar")
+    navegador.add_argument('--sqlite', dest='sqlite_file', default=config['sqlite_file'],
+                           help="Guardar también en una base SQLite (sin duplicados, consultable durante el crawl)")
+
+    parser = argparse.ArgumentParser(description="ANMAT Vademecum Scraper")
+    sub = parser.add_subparsers(dest='comando', required=True)
+
+    p = sub.add_parser('crawl', parents=[comun, navegador], help="Crawl completo por laboratorios")
+    p.add_argument('--estrategias', action='store_true',
+                   help="Usar el planificador de estrategias (sembrado con la salida anterior, "
+                        "que se conserva como <output>.anterior.csv)")
+    p.set_defaults(func=_con_navegador(cmd_crawl))
+
+    p = sub.add_parser('resume', parents=[comun, navegador], help="Reanudar un crawl interrumpido")
+    p.set_defaults(func=_con_navegador(cmd_resume))
+
+    p = sub.add_parser('refresh', parents=[comun, navegador], help="Refrescar sólo la disponibilidad")
+    p.add_argument('base', nargs='?', help="CSV, id de snapshot o fecha (por defecto, la salida configurada)")
+    p.add_argument('--cambios', default='disponibilidad_cambios.csv',
+                   help="CSV donde se registran los cambios de disponibilidad")
+    p.set_defaults(func=_con_navegador(cmd_refresh))
+
+    p = sub.add_parser('probe', parents=[comun, navegador],
+                       help="Estimar cuánto cambió el catálogo desde el último snapshot")
+    p.add_argument('--muestra', type=int, default=30, help="Laboratorios a consultar")
+    p.add_argument('--semilla', type=int, help="Semilla del sorteo (para repetir una muestra)")
+    p.add_argument('--ejecutar', action='store_true',
+                   help="Ejecutar la acción recomendada (crawl completo o refresco de disponibilidad)")
+    p.add_argument('--cambios', default='disponibilidad_cambios.csv',
+                   help="CSV de cambios de disponibilidad (acción delta)")
+    p.set_defaults(func=_con_navegador(cmd_probe), estrategias=False)
+
+    p = sub.add_parser('export', parents=[comun], help="Exportar un snapshot a CSV")
+    p.add_argument('referencia', help="Id de snapshot o fecha ISO")
+    p.add_argument('destino', help="CSV de destino")
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser('diff', parents=[comun], help="Comparar dos CSVs o dos snapshots")
+    p.add_argument('a', help="CSV, id de snapshot o fecha")
+    p.add_argument('b', help="CSV, id de snapshot o fecha")
+    p.set_defaults(func=cmd_diff)
+
+    p = sub.add_parser('stats', parents=[comun], help="Resumen de un CSV de salida")
+    p.add_argument('csv_file', nargs='?', help="CSV a resumir (por defecto, la salida configurada)")
+    p.set_defaults(func=cmd_stats)
+
+    p = sub.add_parser('normalize', parents=[comun], help="Normalizar una salida en columnas tipadas")
+    p.add_argument('destino', help="Archivo de destino (.parquet o .csv)")
+    p.add_argument('origen', nargs='?', help="CSV, id de snapshot o fecha (por defecto, la salida configurada)")
+    p.set_defaults(func=cmd_normalize)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser(load_config()).parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
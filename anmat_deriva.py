@@ -0,0 +1,413 @@
+"""
+ANMAT Vademecum - Sonda de cambios del catálogo
+Vuelve a consultar una muestra aleatoria estratificada de laboratorios (ponderada por
+su cantidad de productos en el último snapshot), compara la primera página y el total
+de resultados contra el snapshot y estima, con un intervalo de confianza, la fracción
+del catálogo que cambió. Según la estimación recomienda un crawl completo, un refresco
+de disponibilidad (delta) o no hacer nada.
+"""
+
+import argparse
+import math
+import random
+import re
+from selenium.webdriver.common.by import By
+from selenium.common.exceptions import NoSuchElementException
+
+from anmat_laboratorios import buscar_por_nombre, cargar_plan, normalizar_nombre
+from anmat_registro import colapsar_espacios
+from anmat_scraper_v2 import ANMATScraperV2
+from anmat_selectores import xpath_filas, xpath_paginado
+from anmat_snapshots import AlmacenSnapshots, CAMPOS_CONTENIDO
+
+
+ACCION_COMPLETO = 'completo'
+ACCION_DELTA = 'delta'
+ACCION_NADA = 'nada'
+
+# Laboratorios consultados por sonda
+TAMANO_MUESTRA = 30
+
+# Estratos por tamaño (además del de laboratorios sin productos en el snapshot)
+ESTRATOS = 3
+
+# Mínimo de laboratorios por estrato, para poder estimar su varianza
+MIN_POR_ESTRATO = 2
+
+# Intervalo de confianza del 95%
+Z = 1.96
+
+# Límite superior del intervalo por debajo del cual no se hace nada
+UMBRAL_CAMBIOS = 0.01
+
+# Fracción estimada de altas, bajas o modificaciones (no sólo disponibilidad) a partir
+# de la cual hace falta un crawl completo; el refresco de disponibilidad no las detecta
+UMBRAL_ESTRUCTURAL = 0.005
+
+# Columnas comparadas: sin GTIN (sólo la extracción por red lo obtiene) ni disponibilidad
+_GTIN = CAMPOS_CONTENIDO.index('GTIN')
+_DISPONIBILIDAD = CAMPOS_CONTENIDO.index('Disponibilidad')
+
+
+def _firma(valores):
+    """
+    Valores de una fila comparables entre extracción por DOM y por red
+
+    La sonda lee el DOM (.text, con los espacios colapsados) y el snapshot puede
+    venir de un crawl por red con los valores AU tal cual.
+    """
+    return tuple(colapsar_espacios(v) for i, v in enumerate(valores) if i != _GTIN)
+
+
+def _firma_sin_disponibilidad(valores):
+    """Firma de la fila sin la disponibilidad"""
+    return tuple(colapsar_espacios(v) for i, v in enumerate(valores) if i not in (_GTIN, _DISPONIBILIDAD))
+
+
+def filas_por_laboratorio(laboratorios, filas):
+    """
+    Agrupa las filas de un snapshot por laboratorio del plan
+
+    Args:
+        laboratorios: Nombres de laboratorio del plan de consultas
+        filas: Valores de cada fila en el orden de CAMPOS_CONTENIDO
+
+    Returns:
+        Diccionario nombre del plan -> lista de filas (los del plan sin filas quedan vacíos)
+    """
+    por_normalizado = {normalizar_nombre(nombre): nombre for nombre in laboratorios}
+    laboratorio = CAMPOS_CONTENIDO.index('Laboratorio')
+
+    # Una búsqueda por nombre de la grilla, no por fila
+    nombres = {}
+    agrupadas = {nombre: [] for nombre in laboratorios}
+    for valores in filas:
+        nombre_grilla = valores[laboratorio]
+        if nombre_grilla not in nombres:
+            nombres[nombre_grilla] = buscar_por_nombre(nombre_grilla, por_normalizado)
+        if nombres[nombre_grilla] is not None:
+            agrupadas[nombres[nombre_grilla]].append(valores)
+    return agrupadas
+
+
+def estratificar(tamanos, estratos=ESTRATOS):
+    """
+    Divide los laboratorios en estratos por tamaño con igual cantidad de productos
+
+    Args:
+        tamanos: Diccionario laboratorio -> productos en el snapshot
+        estratos: Cantidad de estratos de laboratorios con productos
+
+    Returns:
+        Lista de estratos (listas de laboratorios); el primero son los laboratorios
+        sin productos en el snapshot
+    """
+    sin_productos = sorted(lab for lab, tamano in tamanos.items() if not tamano)
+    con_productos = sorted((lab for lab, tamano in tamanos.items() if tamano), key=lambda lab: tamanos[lab])
+    total = sum(tamanos.values())
+
+    grupos = [[] for _ in range(estratos)]
+    acumulado = 0
+    for lab in con_productos:
+        # El estrato se elige por la mitad del laboratorio en el acumulado de productos
+        centro = acumulado + tamanos[lab] / 2
+        grupos[min(estratos - 1, int(centro * estratos / total))].append(lab)
+        acumulado += tamanos[lab]
+
+    return [sin_productos] + [grupo for grupo in grupos if grupo]
+
+
+def asignar_muestra(estratos, tamanos, muestra=TAMANO_MUESTRA):
+    """
+    Reparte la muestra entre estratos en proporción a sus productos
+
+    Cada estrato recibe al menos MIN_POR_ESTRATO laboratorios (o todos si tiene menos).
+
+    Returns:
+        Lista con la cantidad de laboratorios a consultar por estrato
+    """
+    total = sum(tamanos.values()) or 1
+    asignacion = []
+    for estrato in estratos:
+        productos = sum(tamanos[lab] for lab in estrato)
+        n = max(MIN_POR_ESTRATO, round(muestra * productos / total))
+        asignacion.append(min(len(estrato), n))
+    return asignacion
+
+
+def sortear(estratos, asignacion, semilla=None):
+    """
+    Sortea los laboratorios de cada estrato
+
+    Returns:
+        Lista de muestras (listas de laboratorios), una por estrato
+    """
+    rng = random.Random(semilla)
+    return [rng.sample(estrato, n) for estrato, n in zip(estratos, asignacion)]
+
+
+def comparar_laboratorio(filas_snapshot, pagina, total):
+    """
+    Estima los productos cambiados de un laboratorio a partir de su primera página
+
+    Las filas de la página que no están en el snapshot se extrapolan al total de
+    resultados; las bajas se estiman por la diferencia entre totales.
+
+    Args:
+        filas_snapshot: Filas del laboratorio en el snapshot
+        pagina: Filas de la primera página actual (valores en el orden de CAMPOS_CONTENIDO);
+            vacía sólo si la grilla mostró el mensaje de sin resultados (ver
+            SondaDeriva.primera_pagina), en cuyo caso todo el laboratorio se dio de baja
+        total: Total de resultados actual (None si no se pudo leer)
+
+    Returns:
+        Diccionario con 'cambios' (todas las diferencias) y 'estructurales'
+        (altas, bajas y modificaciones que no son sólo de disponibilidad)
+    """
+    anterior = len(filas_snapshot)
+    if total is None:
+        total = anterior if pagina else 0
+    bajas = max(0, anterior - total)
+    if not pagina:
+        return {'cambios': float(anterior), 'estructurales': float(anterior)}
+
+    firmas = {_firma(valores) for valores in filas_snapshot}
+    sin_disponibilidad = {_firma_sin_disponibilidad(valores) for valores in filas_snapshot}
+    disponibilidad = 0
+    estructurales = 0
+    for valores in pagina:
+        if _firma(valores) in firmas:
+            continue
+        if _firma_sin_disponibilidad(valores) in sin_disponibilidad:
+            disponibilidad += 1
+        else:
+            estructurales += 1
+
+    escala = total / len(pagina)
+    return {
+        'cambios': (disponibilidad + estructurales) * escala + bajas,
+        'estructurales': estructurales * escala + bajas,
+    }
+
+
+def estimar(estratos, muestras, observados, total_productos):
+    """
+    Estimador estratificado de la fracción de productos cambiados
+
+    Para cada estrato expande la media muestral al total de laboratorios del estrato,
+    con la corrección por población finita en la varianza.
+
+    Args:
+        estratos: Laboratorios de cada estrato
+        muestras: Laboratorios consultados de cada estrato
+        observados: Diccionario laboratorio -> productos cambiados estimados
+        total_productos: Productos del snapshot
+
+    Returns:
+        Diccionario con 'fraccion', 'inferior' y 'superior' (intervalo de confianza)
+    """
+    total = 0.0
+    varianza = 0.0
+    for estrato, muestra in zip(estratos, muestras):
+        valores = [observados[lab] for lab in muestra if lab in observados]
+        n = len(valores)
+        if not n:
+            continue
+        N = len(estrato)
+        media = sum(valores) / n
+        total += N * media
+        if n > 1:
+            s2 = sum((v - media) ** 2 for v in valores) / (n - 1)
+            varianza += N * N * (1 - n / N) * s2 / n
+
+    denominador = max(total_productos, 1)
+    fraccion = total / denominador
+    margen = Z * math.sqrt(varianza) / denominador
+    return {'fraccion': fraccion, 'inferior': max(0.0, fraccion - margen), 'superior': fraccion + margen}
+
+
+def recomendar(cambios, estructurales):
+    """
+    Acción recomendada según las estimaciones
+
+    Args:
+        cambios: Estimación de todos los cambios (ver estimar)
+        estructurales: Estimación de altas, bajas y modificaciones
+
+    Returns:
+        ACCION_COMPLETO, ACCION_DELTA o ACCION_NADA
+    """
+    if estructurales['fraccion'] >= UMBRAL_ESTRUCTURAL:
+        return ACCION_COMPLETO
+    if cambios['superior'] < UMBRAL_CAMBIOS:
+        return ACCION_NADA
+    return ACCION_DELTA
+
+
+def planificar_sonda(laboratorios_file='LaboratoriosANMAT.txt', snapshots_dir='snapshots',
+                     muestra=TAMANO_MUESTRA, semilla=None):
+    """
+    Sortea la muestra contra el último snapshot
+
+    Returns:
+        Diccionario con el snapshot, las filas por laboratorio, los estratos y las muestras
+
+    Raises:
+        KeyError: Si no hay snapshots guardados
+    """
+    almacen = AlmacenSnapshots(snapshots_dir)
+    if not almacen.catalogo:
+        raise KeyError(f"No hay snapshots en {snapshots_dir}")
+    snapshot, filas_snapshot = almacen.snapshot(almacen.catalogo[-1]['id'])
+
+    laboratorios = [consulta['nombre'] for consulta in cargar_plan(laboratorios_file)]
+    filas = filas_por_laboratorio(laboratorios, filas_snapshot)
+    tamanos = {lab: len(filas[lab]) for lab in laboratorios}
+
+    estratos = estratificar(tamanos)
+    muestras = sortear(estratos, asignar_muestra(estratos, tamanos, muestra), semilla)
+    return {'snapshot': snapshot, 'filas': filas, 'estratos': estratos, 'muestras': muestras}
+
+
+def sondear(scraper, plan):
+    """
+    Consulta los laboratorios sorteados y estima la fracción cambiada
+
+    Args:
+        scraper: Instancia de SondaDeriva (se cierra al terminar)
+        plan: Resultado de planificar_sonda
+
+    Returns:
+        Diccionario con estimaciones 'cambios' y 'estructurales', la 'accion'
+        recomendada y los laboratorios consultados
+    """
+    cambios = {}
+    estructurales = {}
+    consultados = [lab for muestra in plan['muestras'] for lab in muestra]
+
+    try:
+        for idx, laboratorio in enumerate(consultados, 1):
+            print(f"\n[{idx}/{len(consultados)}] Sonda: {laboratorio[:60]}")
+            try:
+                pagina, total = scraper.primera_pagina(laboratorio)
+            except Exception as e:
+                # Una búsqueda fallida no equivale a un laboratorio vacío: queda fuera de la muestra
+                print(f"    Error: {str(e)}")
+                continue
+            observado = comparar_laboratorio(plan['filas'][laboratorio], pagina, total)
+            cambios[laboratorio] = observado['cambios']
+            estructurales[laboratorio] = observado['estructurales']
+            print(f"    {len(plan['filas'][laboratorio])} -> {total if total is not None else '?'} productos, "
+                  f"~{observado['cambios']:.0f} cambiados")
+    finally:
+        scraper.close()
+
+    total_productos = sum(len(filas) for filas in plan['filas'].values())
+    estimacion = {
+        'cambios': estimar(plan['estratos'], plan['muestras'], cambios, total_productos),
+        'estructurales': estimar(plan['estratos'], plan['muestras'], estructurales, total_productos),
+        'consultados': len(cambios),
+    }
+    estimacion['accion'] = recomendar(estimacion['cambios'], estimacion['estructurales'])
+    return estimacion
+
+
+def imprimir_estimacion(plan, estimacion):
+    """Imprime la estimación y la acción recomendada"""
+    print("=" * 70)
+    print(f"Snapshot: {plan['snapshot']['id']} ({plan['snapshot']['fecha']})")
+    print(f"Laboratorios consultados: {estimacion['consultados']} en {len(plan['estratos'])} estratos")
+    for nombre in ('cambios', 'estructurales'):
+        e = estimacion[nombre]
+        print(f"  {nombre:13s} {e['fraccion']:6.2%}  (IC 95%: {e['inferior']:.2%} - {e['superior']:.2%})")
+    print(f"Accion recomendada: {estimacion['accion']}")
+    print("=" * 70)
+
+
+class SondaDeriva(ANMATScraperV2):
+    def __init__(self, laboratorios_file='LaboratoriosANMAT.txt', headless=True, delay=0.5):
+        """
+        Inicializa la sonda: scraper V2 que lee sólo la primera página y el total
+        de resultados de cada laboratorio, sin archivo de salida
+
+        Args:
+            laboratorios_file: Archivo CSV con la lista de laboratorios
+            headless: Si True, ejecuta Chrome en modo sin interfaz gráfica
+            delay: Tiempo de espera en segundos entre solicitudes
+        """
+        self.total_resultados = None
+        super().__init__(
+            laboratorios_file=laboratorios_file,
+            output_file=None,
+            headless=headless,
+            delay=delay
+        )
+
+    def _init_csv(self):
+        """La sonda no escribe un archivo de salida"""
+
+    def primera_pagina(self, laboratorio):
+        """
+        Busca un laboratorio y lee su primera página de resultados
+
+        Returns:
+            Tupla (filas en el orden de CAMPOS_CONTENIDO, total de resultados o None)
+
+        Raises:
+            TimeoutError: Si la búsqueda no respondió
+            RuntimeError: Si la búsqueda falló por otro motivo (laboratorio no encontrado
+                en el popup, error al elegirlo, grilla sin filas); sólo el mensaje de
+                grilla vacía cuenta como cero resultados
+        """
+        self.total_resultados = None
+        self.sin_resultados = False
+        timeouts = self.timeouts_consecutivos
+        results = self.search_by_laboratorio(laboratorio)
+        if not results and not self.sin_resultados:
+            if self.timeouts_consecutivos > timeouts:
+                raise TimeoutError(f"sin respuesta para {laboratorio}")
+            raise RuntimeError(f"la búsqueda de {laboratorio} falló sin el mensaje de grilla vacía")
+        return [list(result[:-1]) for result in results], self.total_resultados
+
+    def _extract_results(self, laboratorio_nombre):
+        """
+        Extrae sólo la primera página y el total del paginador
+
+        Yields:
+            Segundos de espera antes del siguiente paso
+
+        Returns:
+            Lista de Medicamento de la primera página
+        """
+        yield 1
+        rows = self.driver.find_elements(By.XPATH, xpath_filas(self.selectores))
+
+        # Paginador de ZK: "[ 1 - 10 / 57 ]"
+        try:
+            info = self.driver.find_element(
+                By.XPATH, xpath_paginado(self.selectores) + "//*[contains(@class, 'z-paging-info')]"
+            ).text
+            total = re.search(r'/\s*([\d.,]+)', info)
+            if total:
+                self.total_resultados = int(re.sub(r'\D', '', total.group(1)))
+        except NoSuchElementException:
+            pass
+
+        return self._extract_page_dom(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Estima cuánto cambió el catálogo desde el último snapshot")
+    parser.add_argument('--laboratorios-file', default='LaboratoriosANMAT.txt')
+    parser.add_argument('--snapshots-dir', default='snapshots')
+    parser.add_argument('--muestra', type=int, default=TAMANO_MUESTRA, help="Laboratorios a consultar")
+    parser.add_argument('--semilla', type=int, help="Semilla del sorteo (para repetir una muestra)")
+    args = parser.parse_args()
+
+    plan = planificar_sonda(args.laboratorios_file, args.snapshots_dir, args.muestra, args.semilla)
+    estimacion = sondear(SondaDeriva(args.laboratorios_file), plan)
+    imprimir_estimacion(plan, estimacion)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+"""
+ANMAT Vademecum - Refresco de disponibilidad
+Vuelve a recorrer las páginas de resultados de los laboratorios de un snapshot leyendo
+sólo la clave de cada fila y el ícono de disponibilidad (una única lectura por página),
+y registra únicamente las disponibilidades que cambiaron
+"""
+
+import argparse
+import csv
+import os
+from datetime import datetime
+
+from anmat_laboratorios import normalizar_nombre
+from anmat_registro import Medicamento, clave_producto, colapsar_espacios, leer_csv
+from anmat_scraper_v2 import ANMATScraperV2
+
+
+CAMPOS_CAMBIOS = [
+    'Numero_Certificado',
+    'GTIN',
+    'Nombre_Comercial_Presentacion',
+    'Laboratorio',
+    'Disponibilidad_Anterior',
+    'Disponibilidad',
+    'Timestamp_Extraccion'
+]
+
+# Lectura de todas las filas de la página en un solo round-trip:
+# certificado, nombre comercial, presentación, GTIN e ícono de disponibilidad (ojo)
+LEER_PAGINA_JS = """
+return arguments[0].map(function (row) {
+    var cells = row.cells;
+    if (cells.length < 9) {
+        return null;
+    }
+    return [
+        cells[1].textContent.trim(),
+        cells[3].textContent.trim(),
+        cells[5].textContent.trim(),
+        cells[6].textContent.trim(),
+        cells.length > 9 ? cells[9].getElementsByTagName('img').length > 0 : null
+    ];
+});
+"""
+
+
+def clave_refresco(registro):
+    """Clave de producto con los espacios colapsados, comparable entre .text y textContent"""
+    return tuple(colapsar_espacios(valor) for valor in clave_producto(registro))
+
+
+def cargar_base(origen, snapshots_dir='snapshots', cambios_file='disponibilidad_cambios.csv'):
+    """
+    Disponibilidad conocida de cada producto: la del snapshot más los cambios
+    registrados por refrescos posteriores
+
+    Args:
+        origen: CSV de salida, id de snapshot o fecha
+        snapshots_dir: Directorio del almacén de snapshots
+        cambios_file: Registro de cambios de disponibilidad
+
+    Returns:
+        Diccionario clave de producto -> [Disponibilidad, Laboratorio]
+    """
+    if os.path.isfile(origen):
+        registros = list(leer_csv(origen))
+        fecha_base = max((registro.Timestamp_Extraccion for registro in registros), default='')
+    else:
+        from anmat_snapshots import AlmacenSnapshots
+
+        snapshot, filas = AlmacenSnapshots(snapshots_dir).snapshot(origen)
+        fecha_base = snapshot['fecha']
+        registros = [Medicamento(*valores, fecha_base) for valores in filas]
+
+    base = {clave_refresco(registro): [registro.Disponibilidad, registro.Laboratorio] for registro in registros}
+
+    # Los cambios registrados después del snapshot son la disponibilidad vigente
+    if os.path.exists(cambios_file):
+        with open(cambios_file, 'r', newline='', encoding='utf-8-sig') as f:
+            for row in csv.DictReader(f):
+                clave = tuple(colapsar_espacios(row[campo]) for campo in
+                              ('Numero_Certificado', 'GTIN', 'Nombre_Comercial_Presentacion'))
+                if clave in base and row['Timestamp_Extraccion'] > fecha_base:
+                    base[clave][0] = row['Disponibilidad']
+
+    return base
+
+
+class RefrescoDisponibilidad(ANMATScraperV2):
+    def __init__(self, base, laboratorios_file='LaboratoriosANMAT.txt', cambios_file='disponibilidad_cambios.csv',
+                 headless=False, delay=2, progress_file=None):
+        """
+        Inicializa el refresco de disponibilidad
+
+        Args:
+            base: Diccionario de disponibilidad conocida (ver cargar_base)
+            laboratorios_file: Archivo CSV con la lista de laboratorios
+            cambios_file: CSV donde se agregan los cambios de disponibilidad
+            headless: Si True, ejecuta Chrome en modo sin interfaz gráfica
+            delay: Tiempo de espera en segundos entre solicitudes
+            progress_file: Archivo donde se registra el último laboratorio procesado
+        """
+        self.base = base
+        # Certificado + presentación -> clave, para filas leídas con otro GTIN que el
+        # del snapshot (los extraídos del DOM no tienen GTIN); None si es ambigua
+        self.sin_gtin = {}
+        for clave in base:
+            self.sin_gtin[(clave[0], clave[2])] = None if (clave[0], clave[2]) in self.sin_gtin else clave
+        self.cambios = 0
+        self.sin_cambios = 0
+        self.nuevos = 0
+
+        # La lectura por página se hace sobre el DOM (ver _extract_page_dom)
+        super().__init__(
+            laboratorios_file=laboratorios_file,
+            output_file=cambios_file,
+            headless=headless,
+            delay=delay,
+            capture_network=False,
+            append=True,
+            progress_file=progress_file
+        )
+
+        # Sólo los laboratorios que tienen productos en el snapshot
+        en_base = {normalizar_nombre(laboratorio) for _, laboratorio in base.values()}
+        self.laboratorios = [
+            consulta['nombre'] for consulta in self.plan
+            if any(consulta['normalizado'].startswith(lab) or lab.startswith(consulta['normalizado'])
+                   for lab in en_base if lab)
+        ]
+
+    def _init_csv(self):
+        """Inicializa el registro de cambios (se agrega a uno existente)"""
+        if os.path.exists(self.output_file) and os.path.getsize(self.output_file) > 0:
+            return
+
+        with open(self.output_file, 'w', newline='', encoding='utf-8-sig') as f:
+            csv.writer(f).writerow(CAMPOS_CAMBIOS)
+
+    def _extract_page_dom(self, rows):
+        """
+        Lee clave y disponibilidad de todas las filas de la página con un único script
+
+        Args:
+            rows: Elementos <tr> de la grilla de resultados
+
+        Returns:
+            Lista de Medicamento con sólo clave y disponibilidad
+        """
+        timestamp = datetime.now().isoformat()
+        results = []
+        for fila in self.driver.execute_script(LEER_PAGINA_JS, rows):
+            if not fila:
+                continue
+            # textContent conserva los espacios que .text (usado en los snapshots) colapsa
+            numero_certificado, nombre_comercial, presentacion, gtin = (
+                colapsar_espacios(valor) for valor in fila[:4]
+            )
+            ojo = fila[4]
+            if ojo is None:
+                disponibilidad = "Desconocido"
+            else:
+                disponibilidad = "Disponible" if ojo else "No disponible"
+            results.append(self._build_result(
+                numero_certificado, '', nombre_comercial, '', presentacion, gtin, '', disponibilidad, timestamp
+            ))
+        return results
+
+    def _clave_base(self, registro):
+        """Clave del producto en la base, o None si es un producto nuevo"""
+        clave = clave_refresco(registro)
+        if clave in self.base:
+            return clave
+        return self.sin_gtin.get((clave[0], clave[2]))
+
+    def save_results(self, results):
+        """
+        Registra sólo las filas cuya disponibilidad cambió respecto de la base
+
+        Args:
+            results: Lista de Medicamento leída por _extract_page_dom
+        """
+        cambios = []
+        for registro in results:
+            clave = self._clave_base(registro)
+            if clave is None:
+                self.nuevos += 1
+                continue
+
+            anterior, laboratorio = self.base[clave]
+            if registro.Disponibilidad == anterior or registro.Disponibilidad == "Desconocido":
+                self.sin_cambios += 1
+                continue
+
+            cambios.append(clave + (laboratorio, anterior, registro.Disponibilidad, registro.Timestamp_Extraccion))
+            self.base[clave][0] = registro.Disponibilidad
+
+        self.results_count += len(results)
+        if not cambios:
+            return
+
+        with open(self.output_file, 'a', newline='', encoding='utf-8-sig') as f:
+            csv.writer(f).writerows(cambios)
+        self.cambios += len(cambios)
+        print(f"    [OK] {len(cambios)} cambios de disponibilidad")
+
+    def run(self, start_from=None, max_labs=None):
+        """
+        Recorre los laboratorios del snapshot (ver ANMATScraperV2.run)
+
+        Returns:
+            True si se procesaron todos los laboratorios restantes
+        """
+        completado = super().run(start_from=start_from, max_labs=max_labs)
+        print(f"Cambios de disponibilidad: {self.cambios} (sin cambios: {self.sin_cambios}, "
+              f"productos fuera del snapshot: {self.nuevos})")
+        return completado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresca sólo la disponibilidad de un snapshot")
+    parser.add_argument('base', help="CSV de salida, id de snapshot o fecha")
+    parser.add_argument('--laboratorios-file', default='LaboratoriosANMAT.txt')
+    parser.add_argument('--snapshots-dir', default='snapshots')
+    parser.add_argument('--cambios', default='disponibilidad_cambios.csv', help="Registro de cambios")
+    parser.add_argument('--max-labs', type=int, help="Número máximo de laboratorios")
+    args = parser.parse_args()
+
+    refresco = RefrescoDisponibilidad(
+        cargar_base(args.base, args.snapshots_dir, args.cambios),
+        laboratorios_file=args.laboratorios_file,
+        cambios_file=args.cambios,
+        headless=True,
+        delay=0.5
+    )
+    refresco.run(max_labs=args.max_labs)
+
+
+if __name__ == "__main__":
+    main()
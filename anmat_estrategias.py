@@ -0,0 +1,397 @@
+"""
+ANMAT Vademecum - Planificador de estrategias de búsqueda
+Combina las búsquedas por laboratorio, por monodroga y por prefijo de nombre comercial
+según el rendimiento (consultas por producto que sólo esa estrategia encuentra)
+medido en corridas anteriores
+"""
+
+import itertools
+import json
+import os
+import re
+import string
+import time
+from datetime import datetime
+
+from anmat_registro import clave_producto, leer_csv
+
+
+ESTRATEGIA_LABORATORIO = 'laboratorio'
+ESTRATEGIA_GENERICO = 'generico'
+ESTRATEGIA_PREFIJO = 'prefijo'
+
+ESTRATEGIAS = (ESTRATEGIA_GENERICO, ESTRATEGIA_LABORATORIO, ESTRATEGIA_PREFIJO)
+
+# Costo estimado (consultas por producto único) para estrategias sin historial.
+# Ordena las estrategias de menor a mayor cantidad de consultas en la primera corrida.
+COSTO_INICIAL = {
+    ESTRATEGIA_GENERICO: 0.5,
+    ESTRATEGIA_LABORATORIO: 1.0,
+    ESTRATEGIA_PREFIJO: 10.0,
+}
+
+# Largo mínimo de búsqueda aceptado por la página
+MIN_TERMINO = 3
+
+# Cada cuántas corridas se vuelve a medir una estrategia excluida del plan (sin
+# productos únicos en su última medición),
+# y con cuántas consultas como máximo
+REMEDIR_CADA = 5
+REMEDIR_CONSULTAS = 50
+
+
+def normalizar_generico(valor):
+    """
+    Separa un valor de Monodroga_Generico en principios activos buscables
+
+    Ejemplo: 'AMILASA 18000 U PH EUR + LIPASA 25000 U' -> ['AMILASA', 'LIPASA']
+
+    Args:
+        valor: Texto de la columna Monodroga_Generico
+
+    Returns:
+        Lista de nombres de principios activos (sin concentraciones)
+    """
+    terminos = []
+    for parte in valor.upper().split('+'):
+        palabras = []
+        for palabra in parte.split():
+            # La concentración marca el fin del nombre del principio activo
+            if re.search(r'\d', palabra):
+                break
+            palabras.append(palabra.strip('.,;()'))
+        termino = ' '.join(p for p in palabras if p)
+        if len(termino) >= MIN_TERMINO:
+            terminos.append(termino)
+    return terminos
+
+
+def cargar_genericos(genericos_file='genericos_anmat.txt', csv_files=()):
+    """
+    Carga la lista local de principios activos, completándola con los valores de
+    Monodroga_Generico de salidas anteriores
+
+    Los términos que empiezan con otro término más corto de la lista se descartan,
+    ya que la búsqueda por genérico los incluye.
+
+    Args:
+        genericos_file: Archivo de texto con un principio activo por línea
+        csv_files: CSVs de corridas anteriores para sembrar la lista
+
+    Returns:
+        Lista ordenada de principios activos a buscar
+    """
+    terminos = set()
+
+    if os.path.exists(genericos_file):
+        with open(genericos_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                termino = line.strip().upper()
+                if len(termino) >= MIN_TERMINO:
+                    terminos.add(termino)
+
+    for csv_file in csv_files:
+        if not os.path.exists(csv_file):
+            continue
+        for registro in leer_csv(csv_file):
+            terminos.update(normalizar_generico(registro.Monodroga_Generico))
+
+    genericos = []
+    for termino in sorted(terminos):
+        # Orden alfabético: un prefijo siempre aparece antes que sus extensiones
+        if genericos and (termino == genericos[-1] or termino.startswith(genericos[-1] + ' ')):
+            continue
+        genericos.append(termino)
+    return genericos
+
+
+def guardar_genericos(genericos, genericos_file='genericos_anmat.txt'):
+    """Guarda la lista de principios activos, uno por línea"""
+    with open(genericos_file, 'w', encoding='utf-8') as f:
+        for termino in genericos:
+            f.write(termino + '\n')
+
+
+def generar_prefijos(length=3):
+    """Genera todas las combinaciones de letras (AAA-ZZZ) de la búsqueda por prefijo"""
+    for combo in itertools.product(string.ascii_uppercase, repeat=length):
+        yield ''.join(combo)
+
+
+def cargar_estadisticas(stats_file='estrategias_stats.json'):
+    """Carga el rendimiento histórico de cada estrategia"""
+    if not os.path.exists(stats_file):
+        return {}
+    with open(stats_file, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def guardar_estadisticas(stats, stats_file='estrategias_stats.json'):
+    """Guarda el rendimiento histórico de cada estrategia"""
+    with open(stats_file, 'w', encoding='utf-8') as f:
+        json.dump(stats, f, indent=2, ensure_ascii=False)
+
+
+def costo_estrategia(stats, estrategia):
+    """
+    Consultas por producto único (encontrado por la estrategia y por ninguna otra de
+    la misma corrida) de la última medición de una estrategia
+
+    Es su aporte marginal: con un catálogo estable ninguna estrategia encuentra
+    productos nuevos, pero la que es la única fuente de algunos sigue siendo necesaria.
+
+    Returns:
+        Costo estimado; infinito si la última medición no aportó productos únicos
+    """
+    ultima = stats.get(estrategia)
+    if not ultima or not ultima.get('consultas') or 'unicos' not in ultima:
+        return COSTO_INICIAL[estrategia]
+    if not ultima['unicos']:
+        return float('inf')
+    return ultima['consultas'] / ultima['unicos']
+
+
+def costo_cobertura(stats, estrategia):
+    """Consultas por producto encontrado (desempate entre estrategias sin productos únicos)"""
+    ultima = stats.get(estrategia)
+    if not ultima or not ultima.get('encontrados'):
+        return COSTO_INICIAL[estrategia]
+    return ultima['consultas'] / ultima['encontrados']
+
+
+def aportes_unicos(encontrados, consultas):
+    """
+    Productos únicos de cada estrategia: los que no encontró ninguna otra de las que
+    siguen en el plan
+
+    Las estrategias redundantes (sin productos únicos) se descartan de a una, empezando
+    por la de más consultas, y los únicos se recalculan sin ellas; así dos estrategias
+    que se cubren mutuamente no quedan ambas fuera del plan.
+
+    Args:
+        encontrados: Diccionario estrategia -> conjunto de claves de producto encontradas
+        consultas: Diccionario estrategia -> consultas realizadas
+
+    Returns:
+        Diccionario estrategia -> cantidad de productos únicos
+    """
+    def unicos_de(estrategia, activas):
+        otras = set().union(*(encontrados[e] for e in activas if e != estrategia))
+        return len(encontrados[estrategia] - otras)
+
+    activas = set(encontrados)
+    unicos = {}
+    for estrategia in sorted(encontrados, key=lambda e: -consultas[e]):
+        unicos[estrategia] = unicos_de(estrategia, activas)
+        if not unicos[estrategia]:
+            activas.discard(estrategia)
+    for estrategia in activas:
+        unicos[estrategia] = unicos_de(estrategia, activas)
+    return unicos
+
+
+def planificar(stats, estrategias=ESTRATEGIAS, corrida=None):
+    """
+    Ordena las estrategias por consultas por producto único (de menor a mayor)
+
+    Las estrategias que en su última medición no aportaron productos únicos quedan
+    fuera del plan, salvo cada REMEDIR_CADA corridas, en que se vuelven a medir con
+    un máximo de REMEDIR_CONSULTAS consultas.
+
+    Args:
+        stats: Rendimiento histórico (ver cargar_estadisticas)
+        estrategias: Estrategias candidatas
+        corrida: Número de la corrida actual (por defecto, la siguiente a la última registrada)
+
+    Returns:
+        Lista de pares (estrategia, máximo de consultas o None) en el orden en que
+        deben ejecutarse
+    """
+    if corrida is None:
+        corrida = stats.get('corridas', 0) + 1
+
+    def clave(estrategia):
+        return (costo_estrategia(stats, estrategia), costo_cobertura(stats, estrategia))
+
+    ordenadas = sorted(estrategias, key=clave)
+    plan = [(e, None) for e in ordenadas if costo_estrategia(stats, e) != float('inf')]
+    if not plan:
+        # Siempre ejecutar al menos una estrategia completa
+        plan = [(ordenadas[0], None)]
+
+    for estrategia in ordenadas:
+        ultima = stats.get(estrategia, {})
+        if any(e == estrategia for e, _ in plan):
+            continue
+        if corrida - ultima.get('corrida', 0) >= REMEDIR_CADA:
+            plan.append((estrategia, REMEDIR_CONSULTAS))
+    return plan
+
+
+class PlanificadorEstrategias:
+    def __init__(self, scraper, stats_file='estrategias_stats.json', genericos_file='genericos_anmat.txt',
+                 seed_csv_files=()):
+        """
+        Inicializa el planificador
+
+        Args:
+            scraper: Instancia de ANMATScraperV2 (ya inicializada) usada para las búsquedas
+            stats_file: Archivo JSON con el rendimiento de corridas anteriores
+            genericos_file: Lista local de principios activos
+            seed_csv_files: CSVs de corridas anteriores para sembrar la lista de genéricos;
+                también son la salida anterior contra la que se cuentan los productos nuevos
+        """
+        self.scraper = scraper
+        self.stats_file = stats_file
+        self.genericos_file = genericos_file
+        self.seed_csv_files = seed_csv_files
+        self.stats = cargar_estadisticas(stats_file)
+        self.vistos = set()
+        self.rendimiento = {}
+        # Productos encontrados por cada estrategia en esta corrida (para los únicos)
+        self.encontrados = {}
+
+        # Productos de la salida anterior (informativo: un producto es nuevo si no estaba ahí)
+        self.anteriores = set()
+        for csv_file in seed_csv_files:
+            if os.path.exists(csv_file):
+                self.anteriores.update(clave_producto(registro) for registro in leer_csv(csv_file))
+
+    def _consultas(self, estrategia):
+        """Devuelve pares (término, función de búsqueda) de una estrategia"""
+        if estrategia == ESTRATEGIA_LABORATORIO:
+            return ((lab, self.scraper.search_by_laboratorio) for lab in self.scraper.laboratorios)
+        if estrategia == ESTRATEGIA_GENERICO:
+            genericos = cargar_genericos(self.genericos_file, self.seed_csv_files)
+            guardar_genericos(genericos, self.genericos_file)
+            return ((gen, self.scraper.search_by_generico) for gen in genericos)
+        return ((pref, self.scraper.search_by_nombre_comercial) for pref in generar_prefijos())
+
+    def run_estrategia(self, estrategia, max_queries=None):
+        """
+        Ejecuta una estrategia guardando sólo los productos no vistos en esta corrida
+
+        Args:
+            estrategia: Nombre de la estrategia
+            max_queries: Número máximo de consultas (None = todas)
+
+        Returns:
+            Diccionario con consultas realizadas, productos encontrados por la estrategia
+            y productos nuevos respecto de la salida anterior
+        """
+        consultas = 0
+        encontrados = self.encontrados.setdefault(estrategia, set())
+
+        for termino, buscar in self._consultas(estrategia):
+            consultas += 1
+            print(f"\n[{estrategia} {consultas}] Buscando: {termino[:60]}")
+
+            results = buscar(termino)
+            nuevos_resultados = []
+            for result in results:
+                clave = clave_producto(result)
+                encontrados.add(clave)
+                if clave not in self.vistos:
+                    self.vistos.add(clave)
+                    nuevos_resultados.append(result)
+
+            if nuevos_resultados:
+                print(f"    [OK] {len(nuevos_resultados)} sin guardar de {len(results)} medicamentos")
+                self.scraper.save_results(nuevos_resultados)
+
+            if max_queries and consultas >= max_queries:
+                print(f"\nAlcanzado limite de {max_queries} consultas")
+                break
+
+            # Pequeña pausa entre búsquedas
+            time.sleep(0.5)
+
+        return {
+            'consultas': consultas,
+            'encontrados': len(encontrados),
+            'nuevos': len(encontrados - self.anteriores),
+        }
+
+    def run(self, max_queries=None):
+        """
+        Ejecuta las estrategias en el orden planificado y actualiza el historial
+
+        Args:
+            max_queries: Número máximo de consultas por estrategia (None = todas)
+
+        Returns:
+            True si todas las estrategias del plan terminaron sin límite de consultas
+            (las re-mediciones con su propio límite cuentan como terminadas); False
+            si se interrumpió o se limitó con max_queries
+        """
+        corrida = self.stats.get('corridas', 0) + 1
+        plan = planificar(self.stats, corrida=corrida)
+        print("=" * 70)
+        print("ANMAT Vademecum - Plan de estrategias")
+        for estrategia, limite in plan:
+            detalle = f" (re-medicion, {limite} consultas)" if limite else ""
+            print(f"  {estrategia}: {costo_estrategia(self.stats, estrategia):.2f} consultas/producto unico{detalle}")
+        print("=" * 70)
+
+        completado = False
+        try:
+            for estrategia, limite in plan:
+                if limite and max_queries:
+                    limite = min(limite, max_queries)
+                resultado = self.run_estrategia(estrategia, max_queries=limite or max_queries)
+                resultado['fecha'] = datetime.now().isoformat()
+                resultado['corrida'] = corrida
+                self.rendimiento[estrategia] = resultado
+            completado = not max_queries
+
+            # Aporte marginal: productos que ninguna otra estrategia del plan encontró
+            unicos = aportes_unicos(
+                self.encontrados, {e: resultado['consultas'] for e, resultado in self.rendimiento.items()}
+            )
+            for estrategia, resultado in self.rendimiento.items():
+                resultado['unicos'] = unicos[estrategia]
+
+            # Sólo corridas completas (con re-mediciones) representan el rendimiento real
+            if not max_queries:
+                self.stats.update(self.rendimiento)
+                self.stats['corridas'] = corrida
+                guardar_estadisticas(self.stats, self.stats_file)
+
+        except KeyboardInterrupt:
+            print("\n\nInterrupcion detectada")
+
+        finally:
+            self.report()
+            self.scraper.close()
+
+        return completado
+
+    def report(self):
+        """Imprime el rendimiento de cada estrategia ejecutada"""
+        print("\n" + "=" * 70)
+        print("Rendimiento por estrategia")
+        for estrategia, resultado in self.rendimiento.items():
+            consultas = resultado['consultas']
+            unicos = resultado.get('unicos')
+            costo = f"{consultas / unicos:.2f}" if unicos else "-"
+            print(f"  {estrategia}: {consultas} consultas, {resultado['encontrados']} productos encontrados, "
+                  f"{resultado['nuevos']} nuevos, {'?' if unicos is None else unicos} unicos, "
+                  f"{costo} consultas/producto unico")
+        print(f"Total de productos unicos: {len(self.vistos)}")
+        print("=" * 70)
+
+
+if __name__ == "__main__":
+    from anmat_scraper_v2 import ANMATScraperV2
+
+    scraper = ANMATScraperV2(
+        laboratorios_file='LaboratoriosANMAT.txt',
+        output_file='medicamentos_anmat_estrategias.csv',
+        headless=True,
+        delay=0.5
+    )
+    planificador = PlanificadorEstrategias(
+        scraper,
+        seed_csv_files=['medicamentos_anmat_completo.csv', 'medicamentos_anmat.csv']
+    )
+    planificador.run()
@@ -0,0 +1,237 @@
+"""
+ANMAT Vademecum - Plan de consultas por laboratorio
+Normaliza los nombres de LaboratoriosANMAT.txt, agrupa los laboratorios duplicados
+y los que colisionan en la búsqueda truncada a 30 caracteres, y elige en el popup
+el ítem correcto (por CUIT/GLN o por nombre) en lugar del primero
+"""
+
+import csv
+import difflib
+import hashlib
+import json
+import os
+import re
+import unicodedata
+
+
+# Largo máximo del texto que se escribe en el popup de laboratorios
+MAX_QUERY = 30
+
+# Sufijos societarios equivalentes; se comparan sin puntuación
+SUFIJOS = [
+    (r'\bSOCIEDAD ANONIMA\b', 'SA'),
+    (r'\bS\s*A\s*C\s*I\s*F\s*I\s*A\b', 'SACIFIA'),
+    (r'\bS\s*A\s*C\s*I\s*F\s*I\b', 'SACIFI'),
+    (r'\bS\s*A\s*I\s*C\s*F\b', 'SAICF'),
+    (r'\bS\s*A\s*C\s*I\s*F\b', 'SACIF'),
+    (r'\bS\s*A\s*I\s*C\b', 'SAIC'),
+    (r'\bS\s*A\s*C\s*I\b', 'SACI'),
+    (r'\bS\s*R\s*L\b', 'SRL'),
+    (r'\bS\s*A\s*U\b', 'SAU'),
+    (r'\bS\s*A\b', 'SA'),
+]
+
+# Versión del formato del plan; cambiarla invalida los planes cacheados
+PLAN_VERSION = 1
+
+
+def normalizar_nombre(nombre):
+    """
+    Normaliza una razón social para compararla
+
+    Ejemplo: 'Laboratorio Elea S.A.C.I.F. y A.' -> 'LABORATORIO ELEA SACIF Y A'
+    """
+    texto = unicodedata.normalize('NFKD', nombre)
+    texto = ''.join(c for c in texto if not unicodedata.combining(c)).upper()
+    texto = re.sub(r'[^A-Z0-9 ]', ' ', texto.replace('.', ' '))
+    texto = ' '.join(texto.split())
+    for patron, reemplazo in SUFIJOS:
+        texto = re.sub(patron, reemplazo, texto)
+    return ' '.join(texto.split())
+
+
+def buscar_por_nombre(nombre, por_normalizado):
+    """
+    Busca un laboratorio por el nombre con que aparece en la grilla de resultados
+
+    La grilla puede mostrar el nombre truncado: si no hay coincidencia exacta se
+    acepta un único nombre normalizado que lo extienda (o al que extienda).
+
+    Args:
+        nombre: Nombre del laboratorio en la grilla
+        por_normalizado: Diccionario nombre normalizado -> valor
+
+    Returns:
+        Valor asociado, o None si no hay una coincidencia única
+    """
+    normalizado = normalizar_nombre(nombre)
+    if normalizado in por_normalizado:
+        return por_normalizado[normalizado]
+    if not normalizado:
+        return None
+    candidatos = [n for n in por_normalizado if n.startswith(normalizado) or normalizado.startswith(n)]
+    return por_normalizado[candidatos[0]] if len(candidatos) == 1 else None
+
+
+def _leer_laboratorios(file_path):
+    """Lee CUIT, GLN y razón social de cada laboratorio"""
+    laboratorios = []
+    with open(file_path, 'r', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        next(reader)  # Saltar encabezado
+        for row in reader:
+            if len(row) >= 3:
+                laboratorios.append({
+                    'cuit': row[0].strip(),
+                    'gln': row[1].strip(),
+                    'nombre': row[2].strip().replace('"', ''),
+                })
+    return laboratorios
+
+
+def construir_plan(laboratorios):
+    """
+    Construye el plan de consultas
+
+    Los laboratorios con el mismo CUIT o el mismo nombre normalizado se buscan una
+    sola vez. Los que comparten la consulta truncada quedan marcados como colisión,
+    para elegir el ítem del popup por CUIT/GLN o nombre.
+
+    Args:
+        laboratorios: Lista de diccionarios con cuit, gln y nombre
+
+    Returns:
+        Lista de consultas (diccionarios), en el orden del archivo
+    """
+    plan = []
+    por_cuit = {}
+    por_nombre = {}
+
+    for lab in laboratorios:
+        normalizado = normalizar_nombre(lab['nombre'])
+        existente = por_cuit.get(lab['cuit']) if lab['cuit'] else None
+        if existente is None:
+            existente = por_nombre.get(normalizado)
+
+        if existente is not None:
+            # Mismo laboratorio escrito de otra forma: no repetir la búsqueda
+            existente['alias'].append(lab['nombre'])
+            continue
+
+        consulta = {
+            'nombre': lab['nombre'],
+            'normalizado': normalizado,
+            'cuit': lab['cuit'],
+            'gln': lab['gln'],
+            'query': lab['nombre'][:MAX_QUERY],
+            'alias': [],
+            'colisiones': [],
+        }
+        plan.append(consulta)
+        if lab['cuit']:
+            por_cuit[lab['cuit']] = consulta
+        por_nombre[normalizado] = consulta
+
+    por_query = {}
+    for consulta in plan:
+        por_query.setdefault(normalizar_nombre(consulta['query']), []).append(consulta)
+    for grupo in por_query.values():
+        if len(grupo) > 1:
+            for consulta in grupo:
+                consulta['colisiones'] = [c['nombre'] for c in grupo if c is not consulta]
+
+    return plan
+
+
+def _hash_archivo(file_path):
+    """Hash del contenido del archivo de laboratorios"""
+    with open(file_path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def cargar_plan(file_path, cache_file=None):
+    """
+    Devuelve el plan de consultas, reutilizando el cache mientras el archivo no cambie
+
+    Args:
+        file_path: Archivo de laboratorios (CSV con CUIT, GLN, Razón Social)
+        cache_file: Archivo JSON del plan cacheado (por defecto, <file_path>.plan.json)
+
+    Returns:
+        Lista de consultas (ver construir_plan)
+    """
+    cache_file = cache_file or file_path + '.plan.json'
+    file_hash = _hash_archivo(file_path)
+
+    if os.path.exists(cache_file):
+        try:
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+            if cache.get('version') == PLAN_VERSION and cache.get('hash') == file_hash:
+                return cache['plan']
+        except (ValueError, KeyError):
+            pass
+
+    plan = construir_plan(_leer_laboratorios(file_path))
+    try:
+        with open(cache_file, 'w', encoding='utf-8') as f:
+            json.dump({'version': PLAN_VERSION, 'hash': file_hash, 'plan': plan}, f, ensure_ascii=False)
+    except OSError:
+        pass  # Sin permisos de escritura: el plan se recalcula en cada corrida
+    return plan
+
+
+def consulta_suelta(nombre):
+    """Consulta para un laboratorio que no está en el plan (p.ej. nombre tomado de la grilla)"""
+    return {
+        'nombre': nombre,
+        'normalizado': normalizar_nombre(nombre),
+        'cuit': '',
+        'gln': '',
+        'query': nombre[:MAX_QUERY],
+        'alias': [],
+        'colisiones': [],
+    }
+
+
+def elegir_item(textos, consulta):
+    """
+    Elige el ítem del popup que corresponde al laboratorio buscado
+
+    Prioridad: CUIT o GLN presente en el texto del ítem, nombre normalizado igual,
+    y por último el nombre más parecido. Si la consulta truncada colisiona con la de
+    otros laboratorios del plan, el más parecido podría ser uno de ellos, por lo que
+    sólo se aceptan las dos primeras.
+
+    Args:
+        textos: Texto de cada ítem del listbox del popup
+        consulta: Consulta del plan
+
+    Returns:
+        Índice del ítem elegido, o None si no hay ítems o no se puede identificar
+        el laboratorio de una consulta con colisiones
+    """
+    if not textos:
+        return None
+
+    digitos = [re.sub(r'\D', '', texto) for texto in textos]
+    for codigo in (consulta['cuit'], consulta['gln']):
+        if codigo:
+            for idx, texto_digitos in enumerate(digitos):
+                if codigo in texto_digitos:
+                    return idx
+
+    nombres = [consulta['normalizado']] + [normalizar_nombre(alias) for alias in consulta['alias']]
+    normalizados = [normalizar_nombre(texto) for texto in textos]
+    for idx, normalizado in enumerate(normalizados):
+        if normalizado in nombres:
+            return idx
+
+    if consulta['colisiones']:
+        return None
+
+    similitudes = [
+        difflib.SequenceMatcher(None, consulta['normalizado'], normalizado).ratio()
+        for normalizado in normalizados
+    ]
+    return max(range(len(textos)), key=lambda idx: similitudes[idx])
@@ -0,0 +1,207 @@
+"""
+ANMAT Vademecum Scraper - Modo multi-pestaña
+Varias pestañas (cada una con su propio desktop ZK) en un único proceso de Chrome.
+Mientras una pestaña espera la respuesta del servidor, el planificador avanza otra.
+"""
+
+import time
+from anmat_scraper_v2 import ANMATScraperV2, MAX_TIMEOUTS_CONSECUTIVOS
+
+
+class ANMATScraperMultiTab(ANMATScraperV2):
+    def __init__(self, laboratorios_file='LaboratoriosANMAT.txt', output_file='medicamentos_anmat_completo.csv',
+                 headless=False, delay=2, tabs=4, append=False, progress_file=None, sqlite_file=None):
+        """
+        Inicializa el scraper multi-pestaña
+
+        Args:
+            laboratorios_file: Archivo CSV con la lista de laboratorios
+            output_file: Nombre del archivo CSV de salida
+            headless: Si True, ejecuta Chrome en modo sin interfaz gráfica
+            delay: Tiempo de espera en segundos entre solicitudes
+            tabs: Cantidad de pestañas que se procesan en simultáneo
+            append: Si True, agrega resultados a un archivo de salida existente
+            progress_file: Archivo donde se registra el último laboratorio procesado
+                (sólo avanza cuando terminaron todos los laboratorios anteriores)
+            sqlite_file: Base SQLite donde también se guardan los resultados
+        """
+        # El log de red es compartido por todas las pestañas, por eso se extrae del DOM
+        super().__init__(
+            laboratorios_file=laboratorios_file,
+            output_file=output_file,
+            headless=headless,
+            delay=delay,
+            capture_network=False,
+            append=append,
+            progress_file=progress_file,
+            sqlite_file=sqlite_file
+        )
+        self.tabs = max(1, tabs)
+        self.handles = []
+        self._abrir_pestanas()
+
+    def _chrome_options(self):
+        """Opciones de Chrome sin ralentizar las pestañas en segundo plano"""
+        chrome_options = super()._chrome_options()
+        chrome_options.add_argument("--disable-background-timer-throttling")
+        chrome_options.add_argument("--disable-backgrounding-occluded-windows")
+        chrome_options.add_argument("--disable-renderer-backgrounding")
+        return chrome_options
+
+    def _abrir_pestanas(self):
+        """Abre las pestañas de trabajo en el navegador actual"""
+        self.handles = [self.driver.current_window_handle]
+        while len(self.handles) < self.tabs:
+            self.driver.switch_to.new_window('tab')
+            self.handles.append(self.driver.current_window_handle)
+
+    def run(self, start_from=None, max_labs=None):
+        """
+        Ejecuta el scraper repartiendo los laboratorios entre las pestañas
+
+        Args:
+            start_from: Nombre del laboratorio desde el cual empezar (para reanudar)
+            max_labs: Número máximo de laboratorios a procesar (None = todos)
+
+        Returns:
+            True si se procesaron todos los laboratorios restantes; False si se
+            interrumpió o start_from no es un laboratorio de la lista
+        """
+        print("=" * 70)
+        print("ANMAT Vademecum Scraper V2 - Busqueda por Laboratorios (multi-pestaña)")
+        print("=" * 70)
+        print(f"URL: {self.url}")
+        print(f"Archivo de salida: {self.output_file}")
+        print(f"Total de laboratorios: {len(self.laboratorios)}")
+        print(f"Pestañas: {self.tabs}")
+        print(f"Delay entre solicitudes: {self.delay}s")
+        print("=" * 70)
+
+        if start_from is not None and start_from not in self.laboratorios:
+            # Un nombre mal escrito no debe dar por completo un crawl que no procesó nada
+            print(f"[ERROR] Laboratorio de inicio no encontrado: {start_from}")
+            self.close()
+            return False
+
+        inicio = self.laboratorios.index(start_from) if start_from else 0
+        orden = list(range(inicio, len(self.laboratorios)))
+        if max_labs:
+            orden = orden[:max_labs]
+
+        pendientes = list(orden)
+        activas = {}
+        intentos = {}
+        terminados = set()
+        siguiente_progreso = 0
+        completado = False
+        max_retries = 3
+
+        try:
+            while pendientes or activas:
+                # Varios timeouts seguidos suelen indicar que cambiaron los ids de ZK
+                if self.timeouts_consecutivos >= MAX_TIMEOUTS_CONSECUTIVOS:
+                    # La verificación navega la primera pestaña: su laboratorio vuelve a la cola
+                    tarea_interrumpida = activas.pop(self.handles[0], None)
+                    if tarea_interrumpida is not None:
+                        pendientes.insert(0, tarea_interrumpida['idx'])
+                    self.driver.switch_to.window(self.handles[0])
+                    self._verificar_selectores()
+
+                # Asignar laboratorios a las pestañas libres
+                for handle in self.handles:
+                    if handle not in activas and pendientes:
+                        idx = pendientes.pop(0)
+                        laboratorio = self.laboratorios[idx]
+                        print(f"\n[{idx + 1}/{len(self.laboratorios)}] Laboratorio: {laboratorio[:60]} "
+                              f"(pestaña {self.handles.index(handle) + 1})")
+                        activas[handle] = {
+                            'idx': idx,
+                            'pasos': self._search_by_laboratorio_pasos(laboratorio),
+                            'listo_en': 0,
+                        }
+
+                # Avanzar la pestaña cuya espera termina primero
+                handle, tarea = min(activas.items(), key=lambda item: item[1]['listo_en'])
+                espera = tarea['listo_en'] - time.time()
+                if espera > 0:
+                    time.sleep(espera)
+
+                try:
+                    self.driver.switch_to.window(handle)
+                    tarea['listo_en'] = time.time() + next(tarea['pasos'])
+                    continue
+                except StopIteration as fin:
+                    results = fin.value
+                except Exception as e:
+                    error_str = str(e).lower()
+                    if 'invalid session id' in error_str or 'disconnected' in error_str:
+                        # Se reinicia el navegador: todas las pestañas vuelven a la cola
+                        print(f"    [REINTENTAR] Error de sesión ({len(activas)} laboratorios en curso)")
+                        for tarea_activa in activas.values():
+                            intentos[tarea_activa['idx']] = intentos.get(tarea_activa['idx'], 0) + 1
+                            if intentos[tarea_activa['idx']] < max_retries:
+                                pendientes.insert(0, tarea_activa['idx'])
+                            else:
+                                print(f"    [ERROR] No se pudo procesar después de {max_retries} intentos")
+                                terminados.add(tarea_activa['idx'])
+                        pendientes.sort()
+                        activas.clear()
+                        self._reiniciar_driver()
+                        self._abrir_pestanas()
+                        time.sleep(2)
+                        continue
+                    print(f"    Error: {str(e)}")
+                    results = []
+
+                del activas[handle]
+                idx = tarea['idx']
+                laboratorio = self.laboratorios[idx]
+                self.laboratorios_procesados += 1
+
+                if results:
+                    print(f"    [OK] {laboratorio[:60]}: encontrados {len(results)} medicamentos")
+                    self.save_results(results)
+                    self.laboratorios_con_resultados += 1
+                    print(f"    Total acumulado: {self.results_count} medicamentos")
+
+                # El progreso sólo avanza sobre laboratorios consecutivos ya terminados
+                terminados.add(idx)
+                while siguiente_progreso < len(orden) and orden[siguiente_progreso] in terminados:
+                    self._save_progress(self.laboratorios[orden[siguiente_progreso]])
+                    siguiente_progreso += 1
+
+            completado = not max_labs or orden[-1:] == [len(self.laboratorios) - 1]
+
+        except KeyboardInterrupt:
+            print("\n\nInterrupcion detectada. Guardando progreso...")
+            if siguiente_progreso < len(orden):
+                laboratorio = self.laboratorios[orden[siguiente_progreso]]
+                print(f"Primer laboratorio sin terminar: {laboratorio}")
+                print(f"Para reanudar, usa: start_from='{laboratorio}'")
+
+        finally:
+            print("\n" + "=" * 70)
+            print(f"Scraping finalizado")
+            print(f"Laboratorios procesados: {self.laboratorios_procesados}/{len(self.laboratorios)}")
+            print(f"Laboratorios con medicamentos: {self.laboratorios_con_resultados}")
+            print(f"Total de medicamentos extraidos: {self.results_count}")
+            print(f"Archivo guardado: {self.output_file}")
+            if self.salida_sqlite:
+                print(f"Base SQLite: {self.salida_sqlite.db_file} ({self.salida_sqlite.total()} productos)")
+            print("=" * 70)
+            self.close()
+
+        return completado
+
+
+if __name__ == "__main__":
+    # Configuración
+    scraper = ANMATScraperMultiTab(
+        laboratorios_file='LaboratoriosANMAT.txt',
+        output_file='medicamentos_anmat_completo.csv',
+        headless=True,
+        delay=0.5,
+        tabs=4  # Pestañas simultáneas en un único Chrome
+    )
+
+    scraper.run()
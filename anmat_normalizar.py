@@ -0,0 +1,285 @@
+"""
+ANMAT Vademecum - Normalización de salidas
+Etapa de post-procesamiento vectorizada (pandas) sobre un CSV o snapshot completo:
+separa nombre comercial y presentación, extrae cantidades y concentraciones, normaliza
+textos y canoniza laboratorios contra LaboratoriosANMAT.txt, generando columnas tipadas
+"""
+
+import argparse
+import os
+import re
+import time
+
+import pandas as pd
+
+from anmat_laboratorios import _leer_laboratorios, buscar_por_nombre, normalizar_nombre
+from anmat_registro import CAMPOS
+
+
+# '1 FRASCO por 20 UNIDADES', '2 BLISTERS x 10 COMPRIMIDOS'
+PATRON_PRESENTACION = (
+    r'^(?P<Envases>\d+)\s+(?P<Envase>.+?)\s+(?:POR|X)\s+'
+    r'(?P<Cantidad>\d+(?:[.,]\d+)?)\s*(?P<Unidad_Cantidad>.*)$'
+)
+
+# Primera concentración del genérico: 'AMOXICILINA 500 MG', 'LIPASA 25000 U PH EUR'
+PATRON_CONCENTRACION = (
+    r'(?P<Concentracion_Valor>\d+(?:[.,]\d+)?)\s*'
+    r'(?P<Concentracion_Unidad>MCG|MG|G|UI|U|ML|%|MEQ|MMOL)\b'
+)
+
+
+def _texto(serie):
+    """Mayúsculas, sin espacios repetidos ni espacios alrededor de '+'"""
+    return (
+        serie.str.upper()
+        .str.replace(r'\s+', ' ', regex=True)
+        .str.replace(r'\s*\+\s*', ' + ', regex=True)
+        .str.strip()
+    )
+
+
+def _numero(serie):
+    """Convierte números con coma o punto decimal a float"""
+    return pd.to_numeric(serie.str.replace(',', '.', regex=False), errors='coerce').astype('Float64')
+
+
+def _entero(serie):
+    """Convierte a entero los dígitos de cada valor ('56.789' -> 56789); sin dígitos queda NA"""
+    digitos = serie.str.replace(r'\D', '', regex=True).replace('', pd.NA)
+    return pd.to_numeric(digitos, errors='coerce').astype('Int64')
+
+
+def _por_valor(serie, funcion):
+    """
+    Aplica una transformación vectorizada a los valores distintos de una columna
+    y la expande a todas las filas
+
+    Formas, genéricos, presentaciones y laboratorios se repiten en miles de filas,
+    así que cada operación de texto recorre sólo los valores distintos.
+
+    Args:
+        serie: Columna de texto (sin nulos)
+        funcion: Recibe una Serie de valores distintos y devuelve Serie o DataFrame
+
+    Returns:
+        Resultado de la función con una fila por fila de la columna original
+    """
+    codigos, valores = pd.factorize(serie)
+    resultado = funcion(pd.Series(valores, dtype='string')).iloc[codigos]
+    resultado.index = serie.index
+    return resultado
+
+
+def _columnas_presentacion(presentaciones):
+    """Presentación normalizada con envases, cantidad y unidad"""
+    presentacion = _texto(presentaciones)
+    extraido = presentacion.str.extract(PATRON_PRESENTACION)
+    return pd.DataFrame({
+        'Presentacion': presentacion,
+        'Envases': pd.to_numeric(extraido['Envases'], errors='coerce').astype('Int64'),
+        'Envase': extraido['Envase'].astype('string'),
+        'Cantidad': _numero(extraido['Cantidad']),
+        'Unidad_Cantidad': extraido['Unidad_Cantidad'].str.strip().astype('string'),
+    })
+
+
+def _columnas_generico(genericos):
+    """Genérico normalizado con la primera concentración y la cantidad de componentes"""
+    generico = _texto(genericos)
+    extraido = generico.str.extract(PATRON_CONCENTRACION)
+    return pd.DataFrame({
+        'Monodroga_Generico': generico,
+        'Concentracion_Valor': _numero(extraido['Concentracion_Valor']),
+        'Concentracion_Unidad': extraido['Concentracion_Unidad'].astype('string'),
+        'Componentes': (generico.str.count(r' \+ ') + 1).where(generico != '', 0).astype('Int64'),
+    })
+
+
+def cargar_catalogo(csv_file):
+    """Lee un CSV de salida como DataFrame de texto (sin convertir vacíos en NaN)"""
+    return pd.read_csv(csv_file, dtype=str, keep_default_na=False, encoding='utf-8-sig')
+
+
+def cargar_snapshot(referencia, directorio='snapshots'):
+    """
+    Carga un snapshot completo como DataFrame de texto, sin escribir el CSV intermedio
+
+    Args:
+        referencia: Id del snapshot o fecha ("as of")
+        directorio: Directorio del almacén de snapshots
+    """
+    from anmat_snapshots import AlmacenSnapshots
+
+    snapshot, filas = AlmacenSnapshots(directorio).snapshot(referencia)
+    df = pd.DataFrame(filas, columns=CAMPOS[:-1], dtype=str)
+    df['Timestamp_Extraccion'] = snapshot['fecha']
+    return df
+
+
+def cargar_origen(origen, snapshots_dir='snapshots'):
+    """Carga un CSV de salida o, si no es un archivo, un snapshot por id o fecha"""
+    if os.path.isfile(origen):
+        return cargar_catalogo(origen)
+    return cargar_snapshot(origen, snapshots_dir)
+
+
+def mapa_laboratorios(nombres, laboratorios_file):
+    """
+    Asocia cada nombre de laboratorio (tal como aparece en la grilla) a su razón social
+    y CUIT en el archivo de laboratorios
+
+    Se normaliza una vez por nombre distinto, no por fila.
+
+    Args:
+        nombres: Nombres de laboratorio distintos
+        laboratorios_file: Archivo de laboratorios (CSV con CUIT, GLN, Razón Social)
+
+    Returns:
+        DataFrame indexado por nombre con columnas Laboratorio_Canonico y CUIT
+    """
+    por_normalizado = {}
+    for lab in _leer_laboratorios(laboratorios_file):
+        por_normalizado.setdefault(normalizar_nombre(lab['nombre']), lab)
+
+    filas = []
+    for nombre in nombres:
+        lab = buscar_por_nombre(nombre, por_normalizado)
+        filas.append((nombre, lab['nombre'] if lab else None, lab['cuit'] if lab else None))
+
+    return pd.DataFrame(filas, columns=['Laboratorio', 'Laboratorio_Canonico', 'CUIT']).set_index('Laboratorio')
+
+
+def normalizar(df, laboratorios_file='LaboratoriosANMAT.txt'):
+    """
+    Normaliza un catálogo completo con operaciones vectorizadas
+
+    Args:
+        df: DataFrame con las columnas del CSV de salida (como texto)
+        laboratorios_file: Archivo de laboratorios para canonizar
+
+    Returns:
+        DataFrame con columnas tipadas
+    """
+    # Separar nombre comercial y presentación (unidos con ' - ' al extraer)
+    # Sin ninguna presentación (o sin filas) la separación no genera la columna 1
+    partes = df['Nombre_Comercial_Presentacion'].str.split(' - ', n=1, expand=True)
+    partes = partes.reindex(columns=[0, 1]).fillna('')
+
+    # Canonizar laboratorios: una normalización por nombre distinto
+    laboratorios = mapa_laboratorios(df['Laboratorio'].unique(), laboratorios_file)
+
+    return pd.concat([
+        _por_valor(partes[0], _texto).rename('Nombre_Comercial'),
+        _por_valor(partes[1], _columnas_presentacion),
+        _por_valor(df['Monodroga_Generico'], _columnas_generico),
+        _por_valor(df['Forma_Farmaceutica'], _texto).rename('Forma_Farmaceutica'),
+        _por_valor(df['Laboratorio'], _texto).rename('Laboratorio'),
+        laboratorios.reindex(df['Laboratorio']).set_index(df.index).astype('string'),
+        _entero(df['Numero_Certificado']).rename('Numero_Certificado'),
+        df['GTIN'].str.strip().replace('', pd.NA).astype('string'),
+        df['Disponibilidad'].map({'Disponible': True, 'No disponible': False}).astype('boolean').rename('Disponible'),
+        pd.to_datetime(df['Timestamp_Extraccion'], errors='coerce', format='ISO8601'),
+    ], axis=1)
+
+
+def guardar(df, output_file):
+    """Guarda el catálogo normalizado (Parquet conserva los tipos; CSV en otro caso)"""
+    if output_file.endswith('.parquet'):
+        df.to_parquet(output_file, index=False)
+    else:
+        df.to_csv(output_file, index=False, encoding='utf-8-sig')
+
+
+def catalogo_sintetico(filas):
+    """Catálogo sintético con la forma del CSV de salida, para benchmarks"""
+    return pd.DataFrame(
+        [
+            (f"Producto  {i % 5000} - 1 blister por {i % 60 + 1} COMPRIMIDOS",
+             f"principio{i % 3000} 500 mg +  otro {i % 700} 25 MG",
+             f"LABORATORIO {i % 430} S.A.", 'comprimido  recubierto', str(40000 + i), f"779{i:010d}",
+             'Disponible' if i % 3 else 'No disponible', '2025-10-10T10:30:00')
+            for i in range(filas)
+        ],
+        columns=CAMPOS
+    )
+
+
+def _normalizar_por_fila(df, laboratorios_file):
+    """Misma normalización fila por fila con re, como referencia del benchmark"""
+    por_normalizado = {normalizar_nombre(lab['nombre']): lab for lab in _leer_laboratorios(laboratorios_file)}
+    presentacion_re = re.compile(PATRON_PRESENTACION, re.IGNORECASE)
+    concentracion_re = re.compile(PATRON_CONCENTRACION, re.IGNORECASE)
+
+    filas = []
+    for registro in df.itertuples(index=False):
+        nombre, _, presentacion = registro.Nombre_Comercial_Presentacion.partition(' - ')
+        generico = ' '.join(registro.Monodroga_Generico.upper().replace('+', ' + ').split())
+        m_presentacion = presentacion_re.match(presentacion.strip())
+        m_concentracion = concentracion_re.search(generico)
+        lab = por_normalizado.get(normalizar_nombre(registro.Laboratorio))
+        filas.append({
+            'Nombre_Comercial': ' '.join(nombre.upper().split()),
+            'Presentacion': ' '.join(presentacion.upper().split()),
+            'Monodroga_Generico': generico,
+            'Forma_Farmaceutica': ' '.join(registro.Forma_Farmaceutica.upper().split()),
+            'Envases': int(m_presentacion['Envases']) if m_presentacion else None,
+            'Cantidad': float(m_presentacion['Cantidad'].replace(',', '.')) if m_presentacion else None,
+            'Concentracion_Valor': (
+                float(m_concentracion['Concentracion_Valor'].replace(',', '.')) if m_concentracion else None
+            ),
+            'Concentracion_Unidad': m_concentracion['Concentracion_Unidad'] if m_concentracion else None,
+            'Laboratorio_Canonico': lab['nombre'] if lab else None,
+            'Disponible': registro.Disponibilidad == 'Disponible',
+        })
+    return pd.DataFrame(filas)
+
+
+def benchmark(filas=200000, laboratorios_file='LaboratoriosANMAT.txt'):
+    """
+    Compara la normalización fila por fila contra la vectorizada sobre un catálogo sintético
+
+    Args:
+        filas: Cantidad de filas del catálogo sintético
+        laboratorios_file: Archivo de laboratorios para canonizar
+
+    Returns:
+        Diccionario con el tiempo (s) de cada variante
+    """
+    df = catalogo_sintetico(filas)
+    medidas = {}
+    for nombre, variante in (('por_fila', _normalizar_por_fila), ('vectorizada', normalizar)):
+        inicio = time.perf_counter()
+        variante(df, laboratorios_file)
+        medidas[nombre] = {'segundos': time.perf_counter() - inicio}
+    return medidas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Normaliza un CSV de salida del scraper de ANMAT")
+    parser.add_argument('origen', nargs='?', help="CSV de salida, id de snapshot o fecha")
+    parser.add_argument('output_file', nargs='?', help="Destino (.parquet o .csv)")
+    parser.add_argument('--snapshots-dir', default='snapshots')
+    parser.add_argument('--laboratorios-file', default='LaboratoriosANMAT.txt')
+    parser.add_argument('--benchmark', type=int, metavar='FILAS',
+                        help="Comparar por fila vs vectorizada sobre un catálogo sintético")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        print(f"Catalogo sintetico: {args.benchmark} filas")
+        for nombre, medida in benchmark(args.benchmark, args.laboratorios_file).items():
+            print(f"  {nombre:12s} {medida['segundos']:.3f} s  "
+                  f"{medida['segundos'] / args.benchmark * 1e6:.2f} us/fila")
+        return
+
+    if not args.origen or not args.output_file:
+        parser.error("se requieren origen y output_file")
+
+    inicio = time.perf_counter()
+    df = normalizar(cargar_origen(args.origen, args.snapshots_dir), args.laboratorios_file)
+    guardar(df, args.output_file)
+    print(f"{len(df)} filas normalizadas en {time.perf_counter() - inicio:.2f} s: {args.output_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+ANMAT Vademecum - Reconciliación de salidas
+Compara dos CSVs de salida (p.ej. V1 y V2) por clave de producto y vuelve a buscar
+sólo los laboratorios o prefijos con faltantes
+"""
+
+import argparse
+import hashlib
+import re
+import sys
+from collections import defaultdict
+
+from anmat_registro import clave_producto, leer_csv
+
+
+def hash_clave(clave):
+    """Hash compacto (entero de 64 bits) de una clave de producto"""
+    data = '\x1f'.join(clave).encode('utf-8')
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'big')
+
+
+# Tres letras ASCII seguidas dentro de una misma palabra: sólo así aparecen tal cual
+# en el nombre y la búsqueda por combinaciones (AAA-ZZZ) encuentra el producto
+PREFIJO = re.compile(r'[A-Z]{3}')
+
+
+def prefijo_busqueda(nombre_comercial_presentacion):
+    """
+    Prefijo de 3 letras con el que la búsqueda por combinaciones encuentra el producto
+
+    Returns:
+        Las primeras 3 letras ASCII seguidas del nombre, o None si no hay ninguna
+        (p.ej. 'ÑAÑO'); esos productos sólo se recuperan por laboratorio
+    """
+    encontrado = PREFIJO.search(nombre_comercial_presentacion.upper())
+    return encontrado.group() if encontrado else None
+
+
+class IndiceClaves:
+    def __init__(self, csv_file):
+        """
+        Indexa un CSV de salida en una sola pasada, guardando sólo hashes de clave
+
+        Args:
+            csv_file: Archivo CSV de salida del scraper
+        """
+        self.csv_file = csv_file
+        self.filas = 0
+        # hash de clave -> (laboratorio, prefijo); los strings repetidos se internan
+        self.claves = {}
+
+        for registro in leer_csv(csv_file):
+            self.filas += 1
+            h = hash_clave(clave_producto(registro))
+            if h not in self.claves:
+                laboratorio = registro.Laboratorio.strip()
+                prefijo = prefijo_busqueda(registro.Nombre_Comercial_Presentacion)
+                self.claves[h] = (sys.intern(laboratorio), prefijo and sys.intern(prefijo))
+
+    def faltantes(self, otro):
+        """Devuelve los hashes presentes en otro índice y ausentes en éste"""
+        return otro.claves.keys() - self.claves.keys()
+
+
+def agrupar_faltantes(faltantes, indice_origen):
+    """
+    Agrupa productos faltantes por laboratorio y por prefijo
+
+    Args:
+        faltantes: Hashes de clave faltantes
+        indice_origen: Índice donde sí están esos productos
+
+    Returns:
+        Tupla (faltantes por laboratorio, faltantes por prefijo, faltantes sin prefijo
+        utilizable por laboratorio) como diccionarios de conteos
+    """
+    por_laboratorio = defaultdict(int)
+    por_prefijo = defaultdict(int)
+    sin_prefijo = defaultdict(int)
+    for h in faltantes:
+        laboratorio, prefijo = indice_origen.claves[h]
+        por_laboratorio[laboratorio] += 1
+        if prefijo:
+            por_prefijo[prefijo] += 1
+        else:
+            sin_prefijo[laboratorio] += 1
+    return dict(por_laboratorio), dict(por_prefijo), dict(sin_prefijo)
+
+
+def reconciliar(csv_a, csv_b):
+    """
+    Compara dos salidas y agrupa los productos faltantes de cada lado
+
+    Args:
+        csv_a: Primer CSV de salida
+        csv_b: Segundo CSV de salida
+
+    Returns:
+        Diccionario con los índices y los faltantes agrupados de cada lado
+    """
+    indice_a = IndiceClaves(csv_a)
+    indice_b = IndiceClaves(csv_b)
+
+    faltan_en_a = indice_a.faltantes(indice_b)
+    faltan_en_b = indice_b.faltantes(indice_a)
+
+    return {
+        'a': indice_a,
+        'b': indice_b,
+        'faltan_en_a': len(faltan_en_a),
+        'faltan_en_b': len(faltan_en_b),
+        'gaps_a': agrupar_faltantes(faltan_en_a, indice_b),
+        'gaps_b': agrupar_faltantes(faltan_en_b, indice_a),
+    }
+
+
+def imprimir_reporte(reporte, max_items=20):
+    """Imprime el resumen de la reconciliación"""
+    a = reporte['a']
+    b = reporte['b']
+    print("=" * 70)
+    print("Reconciliacion de salidas")
+    print("=" * 70)
+    print(f"A: {a.csv_file} ({a.filas} filas, {len(a.claves)} productos unicos)")
+    print(f"B: {b.csv_file} ({b.filas} filas, {len(b.claves)} productos unicos)")
+
+    for lado, origen in (('a', 'B'), ('b', 'A')):
+        total = reporte[f'faltan_en_{lado}']
+        por_laboratorio, _, sin_prefijo = reporte[f'gaps_{lado}']
+        print(f"\nFaltan en {lado.upper()} (presentes en {origen}): {total}")
+        ordenados = sorted(por_laboratorio.items(), key=lambda item: -item[1])
+        for laboratorio, cantidad in ordenados[:max_items]:
+            print(f"  {cantidad:6d}  {laboratorio[:60]}")
+        if len(ordenados) > max_items:
+            print(f"  ... y {len(ordenados) - max_items} laboratorios mas")
+        if sin_prefijo:
+            print(f"  Sin prefijo de 3 letras (sólo se recuperan por laboratorio): "
+                  f"{sum(sin_prefijo.values())} en {len(sin_prefijo)} laboratorios")
+    print("=" * 70)
+
+
+def rescrapear(scraper, laboratorios=(), prefijos=()):
+    """
+    Vuelve a buscar sólo los laboratorios y prefijos con faltantes
+
+    Args:
+        scraper: Instancia de ANMATScraperV2 (su output_file recibe los resultados)
+        laboratorios: Nombres de laboratorio tal como aparecen en la grilla
+        prefijos: Prefijos de nombre comercial (búsqueda por combinaciones)
+    """
+    consultas = [(lab, scraper.search_by_laboratorio) for lab in sorted(laboratorios) if lab]
+    consultas += [(pref, scraper.search_by_nombre_comercial) for pref in sorted(prefijos)]
+
+    try:
+        for idx, (termino, buscar) in enumerate(consultas, 1):
+            print(f"\n[{idx}/{len(consultas)}] Re-scrape: {termino[:60]}")
+            results = buscar(termino)
+            if results:
+                print(f"    [OK] Encontrados {len(results)} medicamentos")
+                scraper.save_results(results)
+
+    except KeyboardInterrupt:
+        print("\n\nInterrupcion detectada")
+
+    finally:
+        print(f"\nTotal de medicamentos re-extraidos: {scraper.results_count}")
+        print(f"Archivo guardado: {scraper.output_file}")
+        scraper.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconcilia dos salidas del scraper de ANMAT")
+    parser.add_argument('csv_a', help="Primer CSV de salida (p.ej. V1)")
+    parser.add_argument('csv_b', help="Segundo CSV de salida (p.ej. V2)")
+    parser.add_argument('--rescrape', choices=['laboratorio', 'prefijo'],
+                        help="Vuelve a buscar los faltantes de ambos lados por laboratorio o por prefijo")
+    parser.add_argument('--output', default='medicamentos_anmat_gaps.csv',
+                        help="CSV de salida del re-scrape")
+    args = parser.parse_args()
+
+    reporte = reconciliar(args.csv_a, args.csv_b)
+    imprimir_reporte(reporte)
+
+    if not args.rescrape:
+        return
+
+    laboratorios = set()
+    prefijos = set()
+    for lado in ('a', 'b'):
+        por_laboratorio, por_prefijo, sin_prefijo = reporte[f'gaps_{lado}']
+        if args.rescrape == 'laboratorio':
+            laboratorios.update(por_laboratorio)
+        else:
+            # Los faltantes sin prefijo utilizable se buscan por su laboratorio
+            laboratorios.update(sin_prefijo)
+            prefijos.update(por_prefijo)
+
+    from anmat_scraper_v2 import ANMATScraperV2
+    scraper = ANMATScraperV2(output_file=args.output, headless=True, delay=0.5)
+    rescrapear(scraper, laboratorios=laboratorios, prefijos=prefijos)
+
+
+if __name__ == "__main__":
+    main()
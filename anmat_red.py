@@ -0,0 +1,182 @@
+"""
+ANMAT Vademecum - Captura de red
+Decodifica las respuestas AU de ZK leidas desde el log de rendimiento de Chrome
+"""
+
+import json
+
+
+# Las respuestas AU de ZK se sirven desde este path (p.ej. /vademecum/zkau)
+AU_PATH = '/zkau'
+
+# Tipos de widget ZK relevantes para la grilla de resultados
+ROW_TYPE = 'zul.grid.Row'
+IMAGE_TYPES = ('zul.wgt.Image', 'zul.wgt.Imagemap')
+
+# Propiedades que contienen texto visible en un widget ZK
+TEXT_PROPS = ('value', 'label')
+
+
+def habilitar_log_rendimiento(chrome_options):
+    """
+    Activa el log de rendimiento (eventos Network.*) en las opciones de Chrome
+
+    Args:
+        chrome_options: Instancia de selenium.webdriver.chrome.options.Options
+    """
+    chrome_options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+
+
+def descartar_log_rendimiento(driver):
+    """Vacía el log de rendimiento sin leer los cuerpos de las respuestas"""
+    driver.get_log('performance')
+
+
+def nuevo_estado_au():
+    """Estado de las requests AU vistas desde el último clic (ver actualizar_estado_au)"""
+    return {'pendientes': set(), 'terminadas': []}
+
+
+def actualizar_estado_au(driver, estado):
+    """
+    Lee (y vacía) el log de rendimiento acumulando las requests AU
+
+    Args:
+        driver: WebDriver de Chrome iniciado con el log de rendimiento activo
+        estado: Diccionario creado con nuevo_estado_au
+
+    Returns:
+        True si ya terminó al menos una respuesta AU y no queda ninguna pendiente
+    """
+    _procesar_eventos_au(driver.get_log('performance'), estado)
+    return bool(estado['terminadas']) and not estado['pendientes']
+
+
+def cuerpos_au(driver, estado):
+    """
+    Cuerpos de las respuestas AU terminadas
+
+    Returns:
+        Lista de cuerpos (str) en orden de llegada
+    """
+    bodies = []
+    for request_id in estado['terminadas']:
+        try:
+            response = driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': request_id})
+        except Exception:
+            # El cuerpo ya no esta disponible (p.ej. la pagina navegó)
+            continue
+        body = response.get('body')
+        if body:
+            bodies.append(body)
+    return bodies
+
+
+def _procesar_eventos_au(entries, estado):
+    """
+    Registra en el estado las requests AU enviadas y las respuestas completas
+
+    Args:
+        entries: Entradas devueltas por driver.get_log('performance')
+        estado: Diccionario creado con nuevo_estado_au
+    """
+    for entry in entries:
+        try:
+            message = json.loads(entry['message'])['message']
+        except (KeyError, TypeError, ValueError):
+            continue
+
+        method = message.get('method')
+        params = message.get('params', {})
+        request_id = params.get('requestId')
+
+        if method == 'Network.requestWillBeSent':
+            if AU_PATH in params.get('request', {}).get('url', ''):
+                estado['pendientes'].add(request_id)
+        elif method == 'Network.responseReceived':
+            if AU_PATH in params.get('response', {}).get('url', ''):
+                estado['pendientes'].add(request_id)
+        elif method == 'Network.loadingFinished':
+            if request_id in estado['pendientes']:
+                estado['pendientes'].discard(request_id)
+                estado['terminadas'].append(request_id)
+        elif method == 'Network.loadingFailed':
+            estado['pendientes'].discard(request_id)
+
+
+def decode_au_rows(bodies):
+    """
+    Extrae las filas de la grilla de resultados desde respuestas AU
+
+    Args:
+        bodies: Lista de cuerpos JSON de respuestas AU
+
+    Returns:
+        Lista de filas; cada fila es una lista de celdas (texto, tiene_imagen).
+        None si algún cuerpo no se pudo decodificar.
+    """
+    rows = []
+    for body in bodies:
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            return None
+        _collect_rows(payload, rows)
+    return rows
+
+
+def _is_widget(node):
+    """Indica si el nodo tiene la forma de un widget ZK: [tipo, uuid, props, ...]"""
+    return (
+        isinstance(node, list)
+        and len(node) >= 3
+        and isinstance(node[0], str)
+        and node[0].startswith('zul.')
+        and isinstance(node[2], dict)
+    )
+
+
+def _widget_children(node):
+    """Devuelve los hijos de un widget ZK"""
+    if len(node) > 4 and isinstance(node[4], list):
+        return [child for child in node[4] if _is_widget(child)]
+    return []
+
+
+def _collect_rows(node, rows):
+    """Recorre el payload buscando widgets de tipo fila"""
+    if _is_widget(node) and node[0] == ROW_TYPE:
+        rows.append([_decode_cell(cell) for cell in _widget_children(node)])
+        return
+
+    if isinstance(node, list):
+        for item in node:
+            _collect_rows(item, rows)
+    elif isinstance(node, dict):
+        for item in node.values():
+            _collect_rows(item, rows)
+
+
+def _decode_cell(cell):
+    """
+    Decodifica una celda, incluyendo celdas ocultas (visible=false) como el GTIN
+
+    Returns:
+        Tupla (texto, tiene_imagen)
+    """
+    texts = []
+    has_img = False
+
+    pending = [cell]
+    while pending:
+        widget = pending.pop(0)
+        props = widget[2]
+        if widget[0] in IMAGE_TYPES or props.get('src') or props.get('image'):
+            has_img = True
+        for prop in TEXT_PROPS:
+            value = props.get(prop)
+            if isinstance(value, str) and value.strip():
+                texts.append(value.strip())
+        pending.extend(_widget_children(widget))
+
+    return ' '.join(texts), has_img
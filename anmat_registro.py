@@ -0,0 +1,179 @@
+"""
+ANMAT Vademecum - Registro de medicamento
+Representación compacta (tupla con nombre) de una fila, usada desde la extracción
+hasta el CSV de salida y en el post-procesamiento
+"""
+
+import csv
+from collections import namedtuple
+
+
+CAMPOS = [
+    'Nombre_Comercial_Presentacion',
+    'Monodroga_Generico',
+    'Laboratorio',
+    'Forma_Farmaceutica',
+    'Numero_Certificado',
+    'GTIN',
+    'Disponibilidad',
+    'Timestamp_Extraccion'
+]
+
+# Los campos coinciden con las columnas del CSV, por lo que un registro se escribe
+# directamente con csv.writer (sin buscar cada clave como csv.DictWriter)
+Medicamento = namedtuple('Medicamento', CAMPOS)
+
+
+def clave_producto(registro):
+    """
+    Clave que identifica un producto: certificado + GTIN + presentación
+
+    Args:
+        registro: Medicamento
+    """
+    return (
+        registro.Numero_Certificado.strip(),
+        registro.GTIN.strip(),
+        registro.Nombre_Comercial_Presentacion.strip(),
+    )
+
+
+def colapsar_espacios(valor):
+    """
+    Colapsa los espacios como lo hace el texto visible de Selenium (.text)
+
+    Los valores leídos por red (AU) o con textContent conservan espacios repetidos y
+    saltos de línea; al colapsarlos se pueden comparar con los leídos del DOM.
+    """
+    return ' '.join(valor.split())
+
+
+def leer_csv(csv_file):
+    """
+    Lee un CSV de salida como registros Medicamento
+
+    Si el encabezado tiene otro orden de columnas se reordena; las columnas
+    faltantes quedan vacías.
+
+    Args:
+        csv_file: Archivo CSV generado por el scraper
+
+    Yields:
+        Un Medicamento por fila
+    """
+    with open(csv_file, 'r', newline='', encoding='utf-8-sig') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+
+        if header == CAMPOS:
+            total = len(CAMPOS)
+            for row in reader:
+                if len(row) != total:
+                    row = (row + [''] * total)[:total]
+                yield Medicamento._make(row)
+            return
+
+        posiciones = [header.index(campo) if campo in header else None for campo in CAMPOS]
+        for row in reader:
+            yield Medicamento._make(
+                row[pos] if pos is not None and pos < len(row) else ''
+                for pos in posiciones
+            )
+
+
+def escribir_csv(csv_file, registros, append=False):
+    """
+    Escribe registros Medicamento en un CSV de salida
+
+    Args:
+        csv_file: Archivo CSV de destino
+        registros: Iterable de Medicamento
+        append: Si True, agrega al archivo existente sin repetir el encabezado
+
+    Returns:
+        Cantidad de registros escritos
+    """
+    escritos = 0
+    with open(csv_file, 'a' if append else 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f)
+        if not append:
+            writer.writerow(CAMPOS)
+        for registro in registros:
+            writer.writerow(registro)
+            escritos += 1
+    return escritos
+
+
+def benchmark(filas=200000, filas_por_pagina=10):
+    """
+    Compara diccionarios con timestamp por fila contra registros Medicamento con
+    timestamp por página, sobre un catálogo sintético
+
+    Args:
+        filas: Cantidad de filas del catálogo sintético
+        filas_por_pagina: Filas por página de resultados
+
+    Returns:
+        Diccionario con tiempo (s) y pico de memoria (bytes) de cada variante
+    """
+    import io
+    import time
+    import tracemalloc
+    from datetime import datetime
+
+    celdas = [
+        (str(40000 + i), 'LABORATORIO %d SA' % (i % 430), 'PRODUCTO %d' % i, 'COMPRIMIDO',
+         '1 BLISTER por %d UNIDADES' % (i % 60), '779%010d' % i, 'PRINCIPIO ACTIVO %d' % (i % 3000))
+        for i in range(filas)
+    ]
+
+    def con_diccionarios():
+        results = []
+        for cert, lab, nombre, forma, presentacion, gtin, generico in celdas:
+            results.append({
+                'Nombre_Comercial_Presentacion': f"{nombre} - {presentacion}",
+                'Monodroga_Generico': generico,
+                'Laboratorio': lab,
+                'Forma_Farmaceutica': forma,
+                'Numero_Certificado': cert,
+                'GTIN': gtin,
+                'Disponibilidad': 'Disponible',
+                'Timestamp_Extraccion': datetime.now().isoformat()
+            })
+        writer = csv.DictWriter(io.StringIO(), fieldnames=CAMPOS)
+        for result in results:
+            writer.writerow(result)
+
+    def con_registros():
+        results = []
+        timestamp = None
+        for idx, (cert, lab, nombre, forma, presentacion, gtin, generico) in enumerate(celdas):
+            if idx % filas_por_pagina == 0:
+                timestamp = datetime.now().isoformat()
+            results.append(Medicamento(
+                f"{nombre} - {presentacion}", generico, lab, forma, cert, gtin, 'Disponible', timestamp
+            ))
+        csv.writer(io.StringIO()).writerows(results)
+
+    medidas = {}
+    for nombre, variante in (('diccionarios', con_diccionarios), ('registros', con_registros)):
+        tracemalloc.start()
+        inicio = time.perf_counter()
+        variante()
+        duracion = time.perf_counter() - inicio
+        pico = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        medidas[nombre] = {'segundos': duracion, 'pico_bytes': pico}
+    return medidas
+
+
+if __name__ == "__main__":
+    filas = 200000
+    medidas = benchmark(filas=filas)
+    print(f"Catalogo sintetico: {filas} filas")
+    for nombre, medida in medidas.items():
+        print(f"  {nombre:12s} {medida['segundos']:.3f} s  "
+              f"{medida['segundos'] / filas * 1e6:.2f} us/fila  "
+              f"pico {medida['pico_bytes'] / 1e6:.1f} MB")
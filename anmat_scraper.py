@@ -15,6 +15,7 @@ from selenium.webdriver.chrome.options import Options
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 import itertools
 import string
+from anmat_registro import CAMPOS, Medicamento
 
 
 class ANMATScraper:
@@ -52,16 +53,7 @@ class ANMATScraper:
         """Inicializa el archivo CSV con encabezados"""
         with open(self.output_file, 'w', newline='', encoding='utf-8-sig') as f:
             writer = csv.writer(f)
-            writer.writerow([
-                'Nombre_Comercial_Presentacion',
-                'Monodroga_Generico',
-                'Laboratorio',
-                'Forma_Farmaceutica',
-                'Numero_Certificado',
-                'GTIN',
-                'Disponibilidad',
-                'Timestamp_Extraccion'
-            ])
+            writer.writerow(CAMPOS)
 
     def generate_search_terms(self, length=3):
         """
@@ -141,7 +133,7 @@ class ANMATScraper:
         Extrae los resultados de la tabla de medicamentos
 
         Returns:
-            Lista de diccionarios con datos de medicamentos
+            Lista de Medicamento
         """
         results = []
 
@@ -160,6 +152,9 @@ class ANMATScraper:
                 if not rows:
                     break
 
+                # Un único timestamp por página
+                timestamp = datetime.now().isoformat()
+
                 for row in rows:
                     try:
                         cells = row.find_elements(By.TAG_NAME, "td")
@@ -187,20 +182,16 @@ class ANMATScraper:
                                 disponibilidad = ""
 
                             # Combinar nombre comercial con presentación
-                            nombre_completo = f"{nombre_comercial} - {presentacion}"
-
-                            resultado = {
-                                'Nombre_Comercial_Presentacion': nombre_completo,
-                                'Monodroga_Generico': generico,
-                                'Laboratorio': laboratorio,
-                                'Forma_Farmaceutica': forma_farmaceutica,
-                                'Numero_Certificado': numero_certificado,
-                                'GTIN': gtin,
-                                'Disponibilidad': disponibilidad,
-                                'Timestamp_Extraccion': datetime.now().isoformat()
-                            }
-
-                            results.append(resultado)
+                            results.append(Medicamento(
+                                f"{nombre_comercial} - {presentacion}",
+                                generico,
+                                laboratorio,
+                                forma_farmaceutica,
+                                numero_certificado,
+                                gtin,
+                                disponibilidad,
+                                timestamp
+                            ))
 
                     except Exception as e:
                         print(f"      Error extrayendo fila: {str(e)}")
@@ -233,26 +224,14 @@ class ANMATScraper:
         Guarda los resultados en el archivo CSV
 
         Args:
-            results: Lista de diccionarios con datos de medicamentos
+            results: Lista de Medicamento
         """
         if not results:
             return
 
         with open(self.output_file, 'a', newline='', encoding='utf-8-sig') as f:
-            writer = csv.DictWriter(f, fieldnames=[
-                'Nombre_Comercial_Presentacion',
-                'Monodroga_Generico',
-                'Laboratorio',
-                'Forma_Farmaceutica',
-                'Numero_Certificado',
-                'GTIN',
-                'Disponibilidad',
-                'Timestamp_Extraccion'
-            ])
-
-            for result in results:
-                writer.writerow(result)
-                self.results_count += 1
+            csv.writer(f).writerows(results)
+        self.results_count += len(results)
 
     def run(self, start_from=None, max_searches=None):
         """
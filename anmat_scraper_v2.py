@@ -14,11 +14,27 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 from selenium.webdriver.common.keys import Keys
+from anmat_registro import CAMPOS, Medicamento
+from anmat_laboratorios import cargar_plan, consulta_suelta, elegir_item
+from anmat_selectores import cargar_selectores, xpath_filas, xpath_paginado
+from anmat_sqlite import SalidaSQLite
+from anmat_red import (habilitar_log_rendimiento, descartar_log_rendimiento, nuevo_estado_au,
+                       actualizar_estado_au, cuerpos_au, decode_au_rows)
+
+
+# Timeouts seguidos tras los cuales se vuelve a verificar la estructura de la página
+MAX_TIMEOUTS_CONSECUTIVOS = 3
+
+# Espera máxima (s) de la respuesta AU tras un clic con captura de red, y cada cuánto
+# se vuelve a leer el log
+MAX_ESPERA_AU = 5
+INTERVALO_AU = 0.1
 
 
 class ANMATScraperV2:
     def __init__(self, laboratorios_file='LaboratoriosANMAT.txt', output_file='medicamentos_anmat_completo.csv',
-                 headless=False, delay=2):
+                 headless=False, delay=2, capture_network=False, append=False, progress_file=None,
+                 sqlite_file=None):
         """
         Inicializa el scraper V2
 
@@ -27,68 +43,84 @@ class ANMATScraperV2:
             output_file: Nombre del archivo CSV de salida
             headless: Si True, ejecuta Chrome en modo sin interfaz gráfica
             delay: Tiempo de espera en segundos entre solicitudes
+            capture_network: Si True, extrae las filas de las respuestas AU de ZK
+                capturadas en el log de red (con respaldo en el DOM)
+            append: Si True, agrega resultados a un archivo de salida existente
+                (para reanudar) en lugar de recrearlo
+            progress_file: Archivo donde se registra el último laboratorio procesado
+            sqlite_file: Base SQLite donde también se guardan los resultados (upsert por
+                producto, sin duplicados al reprocesar un laboratorio)
         """
         self.url = "https://servicios.pami.org.ar/vademecum/views/consultaPublica/listado.zul"
         self.laboratorios_file = laboratorios_file
         self.output_file = output_file
         self.delay = delay
+        self.headless = headless
+        self.capture_network = capture_network
+        self.append = append
+        self.progress_file = progress_file
         self.results_count = 0
+        self.paginas_red = 0
+        self.paginas_dom = 0
         self.laboratorios_procesados = 0
         self.laboratorios_con_resultados = 0
+        self.timeouts_consecutivos = 0
+        # True si la última búsqueda mostró el mensaje de grilla vacía: una lista vacía
+        # sin ese mensaje es una búsqueda fallida, no un laboratorio sin productos
+        self.sin_resultados = False
+        self.estado_au = nuevo_estado_au()
 
-        # Cargar lista de laboratorios
-        self.laboratorios = self._load_laboratorios()
-
-        # Configurar opciones de Chrome
-        chrome_options = Options()
-        if headless:
-            chrome_options.add_argument("--headless")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument("--window-size=1920,1080")
+        # Cargar plan de consultas (laboratorios normalizados y sin duplicados)
+        self.plan = self._load_laboratorios()
+        self.laboratorios = [consulta['nombre'] for consulta in self.plan]
+        self.consultas = {consulta['nombre']: consulta for consulta in self.plan}
 
         # Inicializar driver
-        self.driver = webdriver.Chrome(options=chrome_options)
+        self.driver = webdriver.Chrome(options=self._chrome_options())
         self.wait = WebDriverWait(self.driver, 20)
 
+        # Resolver los ids de ZK de cada control (aborta si la página cambió)
+        try:
+            self.selectores = cargar_selectores(self.driver, self.url)
+        except Exception:
+            self.driver.quit()
+            raise
+
         # Crear archivo CSV con encabezados
         self._init_csv()
+        self.salida_sqlite = SalidaSQLite(sqlite_file) if sqlite_file else None
 
     def _load_laboratorios(self):
-        """Carga la lista de laboratorios desde el archivo CSV"""
-        laboratorios = []
-        import os
+        """Carga el plan de consultas de laboratorios desde el archivo CSV"""
         # Si el archivo no existe en la ruta actual, buscar en el mismo directorio del script
         file_path = self.laboratorios_file
         if not os.path.exists(file_path):
             script_dir = os.path.dirname(os.path.abspath(__file__))
             file_path = os.path.join(script_dir, self.laboratorios_file)
-        
-        with open(file_path, 'r', encoding='utf-8') as f:
-            reader = csv.reader(f)
-            next(reader)  # Saltar encabezado
-            for row in reader:
-                if len(row) >= 3:
-                    # El tercer campo es la Razón Social
-                    razon_social = row[2].strip().replace('"', '')
-                    laboratorios.append(razon_social)
-        return laboratorios
+
+        return cargar_plan(file_path)
 
     def _init_csv(self):
         """Inicializa el archivo CSV con encabezados"""
+        if self.append and os.path.exists(self.output_file) and os.path.getsize(self.output_file) > 0:
+            return
+
         with open(self.output_file, 'w', newline='', encoding='utf-8-sig') as f:
             writer = csv.writer(f)
-            writer.writerow([
-                'Nombre_Comercial_Presentacion',
-                'Monodroga_Generico',
-                'Laboratorio',
-                'Forma_Farmaceutica',
-                'Numero_Certificado',
-                'GTIN',
-                'Disponibilidad',
-                'Timestamp_Extraccion'
-            ])
+            writer.writerow(CAMPOS)
+
+    def _chrome_options(self):
+        """Construye las opciones de Chrome"""
+        chrome_options = Options()
+        if self.headless:
+            chrome_options.add_argument("--headless")
+        chrome_options.add_argument("--no-sandbox")
+        chrome_options.add_argument("--disable-dev-shm-usage")
+        chrome_options.add_argument("--disable-gpu")
+        chrome_options.add_argument("--window-size=1920,1080")
+        if self.capture_network:
+            habilitar_log_rendimiento(chrome_options)
+        return chrome_options
 
     def _reiniciar_driver(self):
         """Reinicia el navegador Chrome"""
@@ -97,14 +129,8 @@ class ANMATScraperV2:
                 self.driver.quit()
         except:
             pass
-        
-        chrome_options = Options()
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument("--window-size=1920,1080")
-        
-        self.driver = webdriver.Chrome(options=chrome_options)
+
+        self.driver = webdriver.Chrome(options=self._chrome_options())
         self.wait = WebDriverWait(self.driver, 20)
         print("    [INFO] Driver reiniciado")
 
@@ -115,51 +141,90 @@ class ANMATScraperV2:
         Args:
             laboratorio_nombre: Nombre del laboratorio a buscar
 
+        Returns:
+            Lista de medicamentos encontrados
+        """
+        return self._ejecutar_pasos(self._search_by_laboratorio_pasos(laboratorio_nombre))
+
+    def _ejecutar_pasos(self, pasos):
+        """
+        Ejecuta una búsqueda paso a paso, esperando entre pasos lo que cada uno indica
+
+        Las búsquedas son generadores que ceden los segundos de espera (carga de la
+        página, respuesta del servidor) y devuelven la lista de resultados. Así el
+        modo multi-pestaña puede atender otra pestaña durante la espera.
+
+        Args:
+            pasos: Generador de la búsqueda
+
         Returns:
             Lista de medicamentos encontrados
         """
+        try:
+            espera = next(pasos)
+            while True:
+                time.sleep(espera)
+                espera = next(pasos)
+        except StopIteration as fin:
+            return fin.value
+
+    def _search_by_laboratorio_pasos(self, laboratorio_nombre):
+        """
+        Pasos de la búsqueda por laboratorio (ver _ejecutar_pasos)
+
+        Yields:
+            Segundos de espera antes del siguiente paso
+
+        Returns:
+            Lista de medicamentos encontrados
+        """
+        consulta = self.consultas.get(laboratorio_nombre) or consulta_suelta(laboratorio_nombre)
+
         try:
             # Navegar a la página
             self.driver.get(self.url)
-            time.sleep(3)
+            yield 3
 
             # Encontrar el campo Laboratorio (bandbox)
             laboratorio_bandbox = self.wait.until(
-                EC.presence_of_element_located((By.ID, "zk_comp_40-real"))
+                EC.presence_of_element_located((By.ID, self.selectores['laboratorio_input']))
             )
 
             # Hacer clic para abrir el popup
             laboratorio_bandbox.click()
-            time.sleep(1)
+            yield 1
 
             # Esperar a que aparezca el popup
             popup_input = self.wait.until(
-                EC.presence_of_element_located((By.ID, "zk_comp_53"))
+                EC.presence_of_element_located((By.ID, self.selectores['popup_input']))
             )
 
             # Escribir el nombre del laboratorio en el campo de búsqueda del popup
             popup_input.clear()
-            popup_input.send_keys(laboratorio_nombre[:30])  # Primeros 30 caracteres
-            time.sleep(0.5)
+            popup_input.send_keys(consulta['query'])  # Primeros 30 caracteres
+            yield 0.5
 
             # Presionar Enter o hacer clic en la lupa de búsqueda
             try:
-                lupita = self.driver.find_element(By.ID, "zk_comp_54")
+                lupita = self.driver.find_element(By.ID, self.selectores['popup_buscar'])
                 lupita.click()
             except:
                 popup_input.send_keys(Keys.ENTER)
 
-            time.sleep(2)
+            yield 2
 
             # Buscar resultados en el listbox del popup
             try:
                 # Esperar a que aparezcan resultados
                 listbox = self.wait.until(
-                    EC.presence_of_element_located((By.ID, "zk_comp_56"))
+                    EC.presence_of_element_located((By.ID, self.selectores['popup_listbox']))
                 )
 
                 # Buscar filas en el listbox
-                list_items = self.driver.find_elements(By.XPATH, "//div[@id='zk_comp_56']//tr[contains(@class, 'z-listitem')]")
+                list_items = self.driver.find_elements(
+                    By.XPATH,
+                    f"//div[@id='{self.selectores['popup_listbox']}']//tr[contains(@class, 'z-listitem')]"
+                )
 
                 if not list_items:
                     print(f"    No se encontro el laboratorio: {laboratorio_nombre}")
@@ -167,51 +232,168 @@ class ANMATScraperV2:
                     self.driver.find_element(By.TAG_NAME, "body").send_keys(Keys.ESCAPE)
                     return []
 
-                # Hacer clic en el primer resultado (debería ser el exacto)
-                list_items[0].click()
-                time.sleep(1)
+                # Elegir el ítem del laboratorio buscado (por CUIT/GLN o nombre);
+                # la consulta truncada puede listar varios laboratorios
+                idx = elegir_item([item.text for item in list_items], consulta)
+                if idx is None:
+                    print(f"    No se pudo distinguir el laboratorio entre {len(list_items)} items "
+                          f"(colisiona con: {', '.join(consulta['colisiones'])[:60]})")
+                    self.driver.find_element(By.TAG_NAME, "body").send_keys(Keys.ESCAPE)
+                    return []
+                list_items[idx].click()
+                yield 1
 
             except Exception as e:
                 print(f"    Error seleccionando laboratorio: {str(e)}")
                 return []
 
-            # Ahora hacer clic en el botón Buscar principal
-            buscar_btn = self.wait.until(
-                EC.element_to_be_clickable((By.ID, "zk_comp_80"))
-            )
-            buscar_btn.click()
+            # Ahora hacer clic en el botón Buscar principal y extraer
+            return (yield from self._submit_search(laboratorio_nombre))
 
-            # Esperar a que carguen los resultados
-            time.sleep(self.delay)
+        except TimeoutException:
+            self.timeouts_consecutivos += 1
+            print(f"    Timeout en busqueda: {laboratorio_nombre}")
+            return []
+        except Exception as e:
+            print(f"    Error en busqueda {laboratorio_nombre}: {str(e)}")
+            return []
 
-            # Verificar si hay resultados
-            try:
-                empty_msg = self.driver.find_element(
-                    By.XPATH,
-                    "//td[@id='zk_comp_86-empty' and contains(text(), 'No se han encontrado resultados')]"
-                )
-                if empty_msg.is_displayed():
-                    print(f"    No hay medicamentos para: {laboratorio_nombre}")
-                    return []
-            except NoSuchElementException:
-                pass
+    def search_by_generico(self, generico):
+        """
+        Realiza una búsqueda por monodroga/genérico
+
+        Args:
+            generico: Principio activo a buscar (mínimo 3 caracteres)
+
+        Returns:
+            Lista de medicamentos encontrados
+        """
+        return self._ejecutar_pasos(self._search_by_text_input(0, generico))
+
+    def search_by_nombre_comercial(self, nombre_comercial):
+        """
+        Realiza una búsqueda por nombre comercial
+
+        Args:
+            nombre_comercial: Término de búsqueda (mínimo 3 caracteres)
+
+        Returns:
+            Lista de medicamentos encontrados
+        """
+        return self._ejecutar_pasos(self._search_by_text_input(1, nombre_comercial))
+
+    def _search_by_text_input(self, input_index, termino):
+        """
+        Realiza una búsqueda escribiendo en uno de los campos de texto del formulario
+
+        Args:
+            input_index: Posición del campo entre los inputs con maxlength='255'
+                (0: Monodroga/Genérico, 1: Nombre Comercial)
+            termino: Texto a buscar
+
+        Yields:
+            Segundos de espera antes del siguiente paso
+
+        Returns:
+            Lista de medicamentos encontrados
+        """
+        try:
+            # Navegar a la página
+            self.driver.get(self.url)
+            yield 3
 
-            # Extraer resultados
-            return self._extract_results(laboratorio_nombre)
+            self.wait.until(
+                EC.presence_of_element_located((By.XPATH, "//input[@maxlength='255']"))
+            )
+            inputs = self.driver.find_elements(By.XPATH, "//input[@maxlength='255']")
+            if len(inputs) <= input_index:
+                print(f"    Campo de busqueda no encontrado para: {termino}")
+                return []
+
+            text_input = inputs[input_index]
+            text_input.clear()
+            text_input.send_keys(termino)
+            yield 0.5
+
+            return (yield from self._submit_search(termino))
 
         except TimeoutException:
-            print(f"    Timeout en busqueda: {laboratorio_nombre}")
+            self.timeouts_consecutivos += 1
+            print(f"    Timeout en busqueda: {termino}")
             return []
         except Exception as e:
-            print(f"    Error en busqueda {laboratorio_nombre}: {str(e)}")
+            print(f"    Error en busqueda {termino}: {str(e)}")
             return []
 
+    def _submit_search(self, termino):
+        """
+        Hace clic en Buscar con los filtros ya cargados y extrae los resultados
+
+        Args:
+            termino: Término buscado (para los mensajes de progreso)
+
+        Yields:
+            Segundos de espera antes del siguiente paso
+
+        Returns:
+            Lista de medicamentos encontrados
+        """
+        buscar_btn = self.wait.until(
+            EC.element_to_be_clickable((By.ID, self.selectores['buscar']))
+        )
+        if self.capture_network:
+            # Descartar respuestas AU previas (popup, selección de filtros)
+            descartar_log_rendimiento(self.driver)
+        buscar_btn.click()
+        self.timeouts_consecutivos = 0
+
+        # Esperar a que carguen los resultados
+        yield from self._esperar_respuesta()
+
+        # Verificar si hay resultados
+        try:
+            empty_msg = self.driver.find_element(
+                By.XPATH,
+                f"//td[@id='{self.selectores['grid']}-empty' and contains(text(), 'No se han encontrado resultados')]"
+            )
+            if empty_msg.is_displayed():
+                print(f"    No hay medicamentos para: {termino}")
+                self.sin_resultados = True
+                return []
+        except NoSuchElementException:
+            pass
+
+        # Extraer resultados
+        return (yield from self._extract_results(termino))
+
+    def _esperar_respuesta(self):
+        """
+        Espera la respuesta del servidor tras un clic (Buscar, página siguiente)
+
+        Con captura de red se lee el log hasta que termina la respuesta AU (o hasta
+        MAX_ESPERA_AU), en lugar de esperar el delay fijo; sin captura se espera el delay.
+
+        Yields:
+            Segundos de espera antes del siguiente paso
+        """
+        if not self.capture_network:
+            yield self.delay
+            return
+
+        self.estado_au = nuevo_estado_au()
+        limite = time.time() + MAX_ESPERA_AU
+        while not actualizar_estado_au(self.driver, self.estado_au) and time.time() < limite:
+            yield INTERVALO_AU
+
     def _extract_results(self, laboratorio_nombre):
         """
         Extrae los resultados de la tabla de medicamentos
 
+        Yields:
+            Segundos de espera antes del siguiente paso
+
         Returns:
-            Lista de diccionarios con datos de medicamentos
+            Lista de Medicamento
         """
         results = []
 
@@ -221,92 +403,34 @@ class ANMATScraperV2:
             while True:
                 print(f"      Procesando pagina {page_num}...")
 
-                # Esperar a que la tabla esté lista
-                time.sleep(1)
+                page_results = None
+                if self.capture_network:
+                    page_results = self._extract_page_network()
 
-                # Extraer filas de la tabla
-                rows = self.driver.find_elements(
-                    By.XPATH,
-                    "//div[@id='zk_comp_86-body']//tbody[@id='zk_comp_109']/tr[contains(@class, 'z-row')]"
-                )
+                if page_results is None:
+                    # Esperar a que la tabla esté lista
+                    yield 1
 
-                if not rows:
-                    break
+                    # Extraer filas de la tabla
+                    rows = self.driver.find_elements(By.XPATH, xpath_filas(self.selectores))
 
-                print(f"      Encontradas {len(rows)} filas en esta pagina")
+                    if not rows:
+                        break
 
-                for row in rows:
-                    try:
-                        cells = row.find_elements(By.TAG_NAME, "td")
-
-                        if len(cells) >= 9:
-                            # Extraer datos de cada celda
-                            # 0: Envase Secundario (imagen)
-                            # 1: Número Certificado
-                            # 2: Laboratorio
-                            # 3: Nombre Comercial
-                            # 4: Forma Farmacéutica
-                            # 5: Presentación
-                            # 6: GTIN (oculto)
-                            # 7: Genérico
-                            # 8: Detalle (lupa)
-                            # 9: Disponibilidad (ojo)
-
-                            numero_certificado = cells[1].text.strip()
-                            laboratorio = cells[2].text.strip()
-                            nombre_comercial = cells[3].text.strip()
-                            forma_farmaceutica = cells[4].text.strip()
-                            presentacion = cells[5].text.strip()
-                            generico = cells[7].text.strip()
-
-                            # GTIN puede estar en celda oculta
-                            try:
-                                gtin_cell = cells[6] if len(cells) > 6 else None
-                                gtin = gtin_cell.text.strip() if gtin_cell else ""
-                            except:
-                                gtin = ""
-
-                            # Disponibilidad - buscar el icono del ojo
-                            disponibilidad = "Desconocido"
-                            try:
-                                if len(cells) > 9:
-                                    disp_cell = cells[9]
-                                    # Buscar imagen dentro de la celda
-                                    imgs = disp_cell.find_elements(By.TAG_NAME, "img")
-                                    if imgs:
-                                        disponibilidad = "Disponible"
-                                    else:
-                                        disponibilidad = "No disponible"
-                            except:
-                                pass
-
-                            # Combinar nombre comercial con presentación
-                            nombre_completo = f"{nombre_comercial} - {presentacion}"
-
-                            resultado = {
-                                'Nombre_Comercial_Presentacion': nombre_completo,
-                                'Monodroga_Generico': generico,
-                                'Laboratorio': laboratorio,
-                                'Forma_Farmaceutica': forma_farmaceutica,
-                                'Numero_Certificado': numero_certificado,
-                                'GTIN': gtin,
-                                'Disponibilidad': disponibilidad,
-                                'Timestamp_Extraccion': datetime.now().isoformat()
-                            }
-
-                            results.append(resultado)
+                    page_results = self._extract_page_dom(rows)
+                    self.paginas_dom += 1
+                else:
+                    self.paginas_red += 1
 
-                    except Exception as e:
-                        print(f"        Error extrayendo fila: {str(e)}")
-                        continue
+                print(f"      Encontradas {len(page_results)} filas en esta pagina")
+                results.extend(page_results)
 
                 # Verificar si hay más páginas
                 try:
                     # Buscar el botón "Siguiente" en el paginador
                     try:
                         next_button = self.driver.find_element(
-                            By.XPATH,
-                            "//div[@id='zk_comp_98']//a[@name='zk_comp_98-next']"
+                            By.XPATH, xpath_paginado(self.selectores) + "//a[contains(@name, '-next')]"
                         )
                     except NoSuchElementException:
                         print(f"      Boton siguiente no encontrado - fin de paginacion")
@@ -324,8 +448,10 @@ class ANMATScraperV2:
                         print(f"      No hay mas paginas")
                         break
 
+                    if self.capture_network:
+                        descartar_log_rendimiento(self.driver)
                     next_button.click()
-                    time.sleep(self.delay)
+                    yield from self._esperar_respuesta()
                     page_num += 1
 
                 except Exception as e:
@@ -347,31 +473,147 @@ class ANMATScraperV2:
                 print(f"      Error extrayendo resultados: {str(e)}")
             return results
 
+    def _extract_page_dom(self, rows):
+        """
+        Extrae una página de resultados leyendo las filas del DOM
+
+        Args:
+            rows: Elementos <tr> de la grilla de resultados
+
+        Returns:
+            Lista de Medicamento
+        """
+        results = []
+        # Un único timestamp por página
+        timestamp = datetime.now().isoformat()
+
+        for row in rows:
+            try:
+                cells = row.find_elements(By.TAG_NAME, "td")
+
+                if len(cells) >= 9:
+                    # Extraer datos de cada celda
+                    # 0: Envase Secundario (imagen)
+                    # 1: Número Certificado
+                    # 2: Laboratorio
+                    # 3: Nombre Comercial
+                    # 4: Forma Farmacéutica
+                    # 5: Presentación
+                    # 6: GTIN (oculto)
+                    # 7: Genérico
+                    # 8: Detalle (lupa)
+                    # 9: Disponibilidad (ojo)
+
+                    numero_certificado = cells[1].text.strip()
+                    laboratorio = cells[2].text.strip()
+                    nombre_comercial = cells[3].text.strip()
+                    forma_farmaceutica = cells[4].text.strip()
+                    presentacion = cells[5].text.strip()
+                    generico = cells[7].text.strip()
+
+                    # GTIN puede estar en celda oculta
+                    try:
+                        gtin_cell = cells[6] if len(cells) > 6 else None
+                        gtin = gtin_cell.text.strip() if gtin_cell else ""
+                    except:
+                        gtin = ""
+
+                    # Disponibilidad - buscar el icono del ojo
+                    disponibilidad = "Desconocido"
+                    try:
+                        if len(cells) > 9:
+                            disp_cell = cells[9]
+                            # Buscar imagen dentro de la celda
+                            imgs = disp_cell.find_elements(By.TAG_NAME, "img")
+                            if imgs:
+                                disponibilidad = "Disponible"
+                            else:
+                                disponibilidad = "No disponible"
+                    except:
+                        pass
+
+                    results.append(self._build_result(
+                        numero_certificado, laboratorio, nombre_comercial, forma_farmaceutica,
+                        presentacion, gtin, generico, disponibilidad, timestamp
+                    ))
+
+            except Exception as e:
+                print(f"        Error extrayendo fila: {str(e)}")
+                continue
+
+        return results
+
+    def _extract_page_network(self):
+        """
+        Extrae una página de resultados desde las respuestas AU capturadas en el log de red
+
+        Returns:
+            Lista de Medicamento, o None si no se pudieron
+            decodificar filas (en ese caso se usa la extracción por DOM)
+        """
+        try:
+            # Respuestas AU de la última espera (ver _esperar_respuesta)
+            rows = decode_au_rows(cuerpos_au(self.driver, self.estado_au))
+        except Exception as e:
+            error_str = str(e).lower()
+            if 'invalid session id' in error_str or 'disconnected' in error_str:
+                raise
+            print(f"        Error leyendo log de red: {str(e)}")
+            return None
+
+        if not rows:
+            return None
+
+        results = []
+        # Un único timestamp por página
+        timestamp = datetime.now().isoformat()
+        for cells in rows:
+            if len(cells) < 9:
+                continue
+
+            # Mismo orden de columnas que la grilla (ver _extract_page_dom)
+            if len(cells) > 9:
+                disponibilidad = "Disponible" if cells[9][1] else "No disponible"
+            else:
+                disponibilidad = "Desconocido"
+
+            results.append(self._build_result(
+                cells[1][0], cells[2][0], cells[3][0], cells[4][0],
+                cells[5][0], cells[6][0], cells[7][0], disponibilidad, timestamp
+            ))
+
+        return results or None
+
+    def _build_result(self, numero_certificado, laboratorio, nombre_comercial, forma_farmaceutica,
+                      presentacion, gtin, generico, disponibilidad, timestamp):
+        """Arma el registro de un medicamento a partir de los valores de sus celdas"""
+        # Combinar nombre comercial con presentación
+        return Medicamento(
+            f"{nombre_comercial} - {presentacion}",
+            generico,
+            laboratorio,
+            forma_farmaceutica,
+            numero_certificado,
+            gtin,
+            disponibilidad,
+            timestamp
+        )
+
     def save_results(self, results):
         """
-        Guarda los resultados en el archivo CSV
+        Guarda los resultados en el archivo CSV (y en la base SQLite, si se configuró)
 
         Args:
-            results: Lista de diccionarios con datos de medicamentos
+            results: Lista de Medicamento
         """
         if not results:
             return
 
         with open(self.output_file, 'a', newline='', encoding='utf-8-sig') as f:
-            writer = csv.DictWriter(f, fieldnames=[
-                'Nombre_Comercial_Presentacion',
-                'Monodroga_Generico',
-                'Laboratorio',
-                'Forma_Farmaceutica',
-                'Numero_Certificado',
-                'GTIN',
-                'Disponibilidad',
-                'Timestamp_Extraccion'
-            ])
-
-            for result in results:
-                writer.writerow(result)
-                self.results_count += 1
+            csv.writer(f).writerows(results)
+        if self.salida_sqlite:
+            self.salida_sqlite.guardar(results)
+        self.results_count += len(results)
 
     def run(self, start_from=None, max_labs=None):
         """
@@ -380,6 +622,10 @@ class ANMATScraperV2:
         Args:
             start_from: Nombre del laboratorio desde el cual empezar (para reanudar)
             max_labs: Número máximo de laboratorios a procesar (None = todos)
+
+        Returns:
+            True si se procesaron todos los laboratorios restantes; False si se
+            interrumpió o start_from no es un laboratorio de la lista
         """
         print("=" * 70)
         print("ANMAT Vademecum Scraper V2 - Busqueda por Laboratorios")
@@ -387,11 +633,21 @@ class ANMATScraperV2:
         print(f"URL: {self.url}")
         print(f"Archivo de salida: {self.output_file}")
         print(f"Total de laboratorios: {len(self.laboratorios)}")
+        duplicados = sum(len(consulta['alias']) for consulta in self.plan)
+        if duplicados:
+            print(f"Laboratorios duplicados omitidos: {duplicados}")
         print(f"Delay entre solicitudes: {self.delay}s")
         print("=" * 70)
 
+        if start_from is not None and start_from not in self.laboratorios:
+            # Un nombre mal escrito no debe dar por completo un crawl que no procesó nada
+            print(f"[ERROR] Laboratorio de inicio no encontrado: {start_from}")
+            self.close()
+            return False
+
         start_searching = start_from is None
         labs_procesados = 0
+        completado = False
 
         try:
             for idx, laboratorio in enumerate(self.laboratorios, 1):
@@ -407,6 +663,10 @@ class ANMATScraperV2:
 
                 print(f"\n[{idx}/{len(self.laboratorios)}] Laboratorio: {laboratorio[:60]}")
 
+                # Varios timeouts seguidos suelen indicar que cambiaron los ids de ZK
+                if self.timeouts_consecutivos >= MAX_TIMEOUTS_CONSECUTIVOS:
+                    self._verificar_selectores()
+
                 # Reintentar hasta 3 veces si hay error de sesión
                 max_retries = 3
                 for attempt in range(max_retries):
@@ -435,6 +695,8 @@ class ANMATScraperV2:
                             print(f"    Error: {str(e)}")
                             break
 
+                self._save_progress(laboratorio)
+
                 # Verificar límite de laboratorios
                 if max_labs and labs_procesados >= max_labs:
                     print(f"\nAlcanzado limite de {max_labs} laboratorios")
@@ -442,6 +704,8 @@ class ANMATScraperV2:
 
                 # Pequeña pausa entre búsquedas
                 time.sleep(0.5)
+            else:
+                completado = True
 
         except KeyboardInterrupt:
             print("\n\nInterrupcion detectada. Guardando progreso...")
@@ -454,14 +718,40 @@ class ANMATScraperV2:
             print(f"Laboratorios procesados: {self.laboratorios_procesados}/{len(self.laboratorios)}")
             print(f"Laboratorios con medicamentos: {self.laboratorios_con_resultados}")
             print(f"Total de medicamentos extraidos: {self.results_count}")
+            if self.capture_network:
+                print(f"Paginas extraidas por red/DOM: {self.paginas_red}/{self.paginas_dom}")
             print(f"Archivo guardado: {self.output_file}")
+            if self.salida_sqlite:
+                print(f"Base SQLite: {self.salida_sqlite.db_file} ({self.salida_sqlite.total()} productos)")
             print("=" * 70)
             self.close()
 
+        return completado
+
+    def _verificar_selectores(self):
+        """
+        Vuelve a resolver los selectores tras varios timeouts seguidos
+
+        Raises:
+            SelectorDriftError: Si la página cambió y no se encuentran los controles
+        """
+        print(f"    [INFO] {self.timeouts_consecutivos} timeouts seguidos, verificando selectores...")
+        self.selectores = cargar_selectores(self.driver, self.url)
+        self.timeouts_consecutivos = 0
+
+    def _save_progress(self, laboratorio):
+        """Registra el último laboratorio procesado en el archivo de progreso"""
+        if not self.progress_file:
+            return
+        with open(self.progress_file, 'w', encoding='utf-8') as f:
+            f.write(laboratorio + '\n')
+
     def close(self):
-        """Cierra el navegador"""
+        """Cierra el navegador y la base SQLite"""
         if self.driver:
             self.driver.quit()
+        if self.salida_sqlite:
+            self.salida_sqlite.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,178 @@
+"""
+ANMAT Vademecum - Descubrimiento de selectores
+Resuelve al inicio los ids autogenerados por ZK (zk_comp_NN) a partir de atributos
+estables (clases, etiquetas, estructura) y los guarda en un mapa cacheado.
+Si la página cambió y algún control no se encuentra, la corrida se aborta de inmediato.
+"""
+
+import json
+import os
+from datetime import datetime
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.common.keys import Keys
+
+
+# Ids conocidos de la página; se usan como punto de partida si no hay cache
+SELECTORES_DEFAULT = {
+    'laboratorio_input': 'zk_comp_40-real',
+    'popup_input': 'zk_comp_53',
+    'popup_buscar': 'zk_comp_54',
+    'popup_listbox': 'zk_comp_56',
+    'buscar': 'zk_comp_80',
+    'grid': 'zk_comp_86',
+}
+
+POPUP = "//div[contains(@class, 'z-bandbox-popup')]"
+
+# Control lógico -> XPath por atributos estables
+XPATHS = {
+    'laboratorio_input': "//input[contains(@class, 'z-bandbox-input')]",
+    'popup_input': POPUP + "//input[contains(@class, 'z-textbox')]",
+    'popup_buscar': POPUP + "//*[contains(@class, 'z-button') or contains(@class, 'z-image') or self::img]",
+    'popup_listbox': POPUP + "//div[contains(@class, 'z-listbox')]",
+    'buscar': "//button[normalize-space(.)='Buscar' and not(ancestor::div[contains(@class, 'z-bandbox-popup')])]",
+    'grid': "//div[contains(@class, 'z-grid') and .//*[contains(@class, 'z-column') and contains(., 'Certificado')]]",
+}
+
+# Controles sin los cuales no se puede buscar; el resto tiene alternativas en el scraper
+REQUERIDOS = ('laboratorio_input', 'popup_input', 'popup_listbox', 'buscar', 'grid')
+
+# Controles que sólo existen con el popup de laboratorios abierto
+EN_POPUP = ('popup_input', 'popup_buscar', 'popup_listbox')
+
+
+def xpath_filas(selectores):
+    """
+    XPath de las filas de resultados, relativo a la grilla resuelta
+
+    Las filas y el paginador sólo existen después de una búsqueda, por lo que no se
+    resuelven al inicio: se ubican dentro de la grilla en el momento de usarlos.
+    """
+    return (f"//div[@id='{selectores['grid']}-body']//tbody[contains(@class, 'z-rows')]"
+            "/tr[contains(@class, 'z-row')]")
+
+
+def xpath_paginado(selectores):
+    """XPath del paginador de la grilla resuelta (ver xpath_filas)"""
+    return f"//div[@id='{selectores['grid']}']//div[contains(@class, 'z-paging')]"
+
+
+class SelectorDriftError(RuntimeError):
+    """La estructura de la página cambió y no se pudieron resolver los controles"""
+
+
+def _resolver(driver, control):
+    """Id del primer elemento que coincide con el XPath estable del control, o None"""
+    for element in driver.find_elements(By.XPATH, XPATHS[control]):
+        element_id = element.get_attribute('id')
+        if element_id:
+            return element_id
+    return None
+
+
+def descubrir_selectores(driver, url, timeout=20):
+    """
+    Carga la página y resuelve el id actual de cada control lógico
+
+    Args:
+        driver: WebDriver de Chrome
+        url: URL de la consulta pública
+        timeout: Segundos de espera para que cargue la página
+
+    Returns:
+        Diccionario control -> id (None si no se encontró)
+    """
+    driver.get(url)
+    wait = WebDriverWait(driver, timeout)
+    try:
+        wait.until(EC.presence_of_element_located((By.XPATH, XPATHS['laboratorio_input'])))
+    except TimeoutException:
+        pass  # Se informa como control no encontrado
+
+    selectores = {}
+    for control in XPATHS:
+        if control not in EN_POPUP:
+            selectores[control] = _resolver(driver, control)
+
+    # Los controles del popup sólo existen después de abrirlo
+    for control in EN_POPUP:
+        selectores[control] = None
+    if selectores['laboratorio_input']:
+        try:
+            driver.find_element(By.ID, selectores['laboratorio_input']).click()
+            wait.until(EC.presence_of_element_located((By.XPATH, XPATHS['popup_input'])))
+            for control in EN_POPUP:
+                selectores[control] = _resolver(driver, control)
+            driver.find_element(By.TAG_NAME, "body").send_keys(Keys.ESCAPE)
+        except Exception:
+            pass  # Los controles del popup se informan como no encontrados
+
+    return selectores
+
+
+def diff_selectores(anteriores, actuales):
+    """
+    Describe los controles cuyo id cambió
+
+    Returns:
+        Lista de líneas 'control: id_anterior -> id_actual'
+    """
+    lineas = []
+    for control in XPATHS:
+        antes = anteriores.get(control)
+        ahora = actuales.get(control)
+        if antes != ahora:
+            lineas.append(f"{control}: {antes or '(sin id)'} -> {ahora or '(no encontrado)'}")
+    return lineas
+
+
+def cargar_selectores(driver, url, cache_file='anmat_selectores.json'):
+    """
+    Resuelve el mapa de selectores al inicio de la corrida
+
+    Args:
+        driver: WebDriver de Chrome
+        url: URL de la consulta pública
+        cache_file: Archivo JSON con el último mapa resuelto
+
+    Returns:
+        Diccionario control -> id, con los opcionales no encontrados en su valor anterior
+
+    Raises:
+        SelectorDriftError: Si no se encontró algún control requerido
+    """
+    anteriores = dict(SELECTORES_DEFAULT)
+    if os.path.exists(cache_file):
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            anteriores.update(json.load(f).get('selectores', {}))
+
+    actuales = descubrir_selectores(driver, url)
+    faltantes = [control for control in REQUERIDOS if not actuales.get(control)]
+
+    if faltantes:
+        raise SelectorDriftError(
+            "La estructura de la página cambió; no se encontraron: " + ", ".join(faltantes) + "\n  "
+            + "\n  ".join(diff_selectores(anteriores, actuales))
+        )
+
+    # Los opcionales no encontrados (la lupa del popup) conservan su último id conocido
+    selectores = {
+        control: actuales.get(control) or anteriores.get(control)
+        for control in XPATHS
+    }
+
+    cambios = diff_selectores(anteriores, selectores)
+    if cambios:
+        print("[INFO] Selectores actualizados:")
+        for linea in cambios:
+            print(f"  {linea}")
+
+    try:
+        with open(cache_file, 'w', encoding='utf-8') as f:
+            json.dump({'fecha': datetime.now().isoformat(), 'selectores': selectores}, f, indent=2)
+    except OSError:
+        pass
+    return selectores
@@ -0,0 +1,406 @@
+"""
+ANMAT Vademecum - Historial de snapshots
+Almacena cada fila única una sola vez (comprimida) y cada snapshot como un manifiesto
+de hashes de fila, guardado como delta respecto del snapshot anterior
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import zlib
+from datetime import datetime
+
+from anmat_registro import CAMPOS, Medicamento, clave_producto, escribir_csv, leer_csv
+
+try:
+    import zstandard
+except ImportError:  # zlib como respaldo si zstandard no está instalado
+    zstandard = None
+
+
+# Timestamp_Extraccion cambia en cada corrida, por eso no forma parte del hash de fila
+CAMPOS_CONTENIDO = CAMPOS[:-1]
+
+# Cada cuántos snapshots se guarda un manifiesto completo (además del delta)
+CHECKPOINT_CADA = 30
+
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+# Fecha ISO completa o incompleta ('2026-10', '2026-10-01', '2026-10-01T12:30')
+FECHA_ISO = re.compile(r'\d{4}-\d{2}(-\d{2}(T\d{2}(:\d{2}(:\d{2}(\.\d+)?)?)?)?)?')
+
+
+def _comprimir(data):
+    """Comprime con zstd (o zlib si zstandard no está disponible)"""
+    if zstandard is not None:
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    return zlib.compress(data, 9)
+
+
+def _descomprimir(data):
+    """Descomprime datos generados por _comprimir"""
+    if data.startswith(ZSTD_MAGIC):
+        if zstandard is None:
+            raise ImportError("Se requiere el paquete 'zstandard' para leer este snapshot")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data)
+
+
+def hash_fila(valores):
+    """
+    Hash de contenido de una fila (sin Timestamp_Extraccion)
+
+    Args:
+        valores: Lista de valores en el orden de CAMPOS_CONTENIDO
+    """
+    data = '\x1f'.join(valores).encode('utf-8')
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def componer_deltas(deltas):
+    """
+    Combina una secuencia de deltas (agregados, eliminados) en un delta neto
+
+    Args:
+        deltas: Iterable de tuplas (agregados, eliminados) en orden cronológico
+
+    Returns:
+        Tupla (agregados, eliminados) de conjuntos de hashes
+    """
+    agregados = set()
+    eliminados = set()
+    for delta_agregados, delta_eliminados in deltas:
+        for h in delta_agregados:
+            if h in eliminados:
+                eliminados.discard(h)
+            else:
+                agregados.add(h)
+        for h in delta_eliminados:
+            if h in agregados:
+                agregados.discard(h)
+            else:
+                eliminados.add(h)
+    return agregados, eliminados
+
+
+class AlmacenSnapshots:
+    def __init__(self, directorio='snapshots'):
+        """
+        Inicializa el almacén de snapshots
+
+        Args:
+            directorio: Directorio donde se guardan paquetes de filas y manifiestos
+        """
+        self.directorio = directorio
+        self.packs_dir = os.path.join(directorio, 'packs')
+        self.manifiestos_dir = os.path.join(directorio, 'manifiestos')
+        self.catalogo_file = os.path.join(directorio, 'catalogo.json')
+        self.indice_file = os.path.join(directorio, 'objetos.idx')
+
+        os.makedirs(self.packs_dir, exist_ok=True)
+        os.makedirs(self.manifiestos_dir, exist_ok=True)
+
+        self.catalogo = self._load_catalogo()
+        self._indice = None
+        self._packs = {}
+
+    def _load_catalogo(self):
+        """Carga la lista de snapshots en orden cronológico"""
+        if not os.path.exists(self.catalogo_file):
+            return []
+        with open(self.catalogo_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _save_catalogo(self):
+        """Guarda la lista de snapshots"""
+        with open(self.catalogo_file, 'w', encoding='utf-8') as f:
+            json.dump(self.catalogo, f, indent=2, ensure_ascii=False)
+
+    def _indice_objetos(self):
+        """Índice hash de fila -> paquete que la contiene"""
+        if self._indice is None:
+            self._indice = {}
+            if os.path.exists(self.indice_file):
+                with open(self.indice_file, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        h, pack = line.split()
+                        self._indice[h] = pack
+        return self._indice
+
+    def _read_json(self, path):
+        """Lee un archivo JSON comprimido"""
+        with open(path, 'rb') as f:
+            return json.loads(_descomprimir(f.read()).decode('utf-8'))
+
+    def _write_json(self, path, data):
+        """Escribe un archivo JSON comprimido"""
+        with open(path, 'wb') as f:
+            f.write(_comprimir(json.dumps(data, ensure_ascii=False).encode('utf-8')))
+
+    def _manifiesto(self, snapshot_id):
+        """Manifiesto (delta y, si es checkpoint, lista completa) de un snapshot"""
+        return self._read_json(os.path.join(self.manifiestos_dir, f'{snapshot_id}.json.zst'))
+
+    def _pack(self, pack_id):
+        """Filas (hash -> valores) de un paquete"""
+        if pack_id not in self._packs:
+            self._packs[pack_id] = self._read_json(os.path.join(self.packs_dir, f'{pack_id}.json.zst'))
+        return self._packs[pack_id]
+
+    def _posicion(self, referencia):
+        """
+        Posición en el catálogo de un snapshot, por id o por fecha ("as of")
+
+        Args:
+            referencia: Id de snapshot o fecha ISO; con una fecha se usa el último
+                snapshot tomado en o antes de esa fecha. Una fecha incompleta abarca
+                todo su período ('2026-10-01' incluye los snapshots de ese día)
+
+        Raises:
+            KeyError: Si la referencia no es un id existente ni una fecha ISO, o no
+                hay snapshots en o antes de esa fecha
+        """
+        for pos, snapshot in enumerate(self.catalogo):
+            if snapshot['id'] == referencia:
+                return pos
+
+        # Un id inexistente (p.ej. '20261001T999999') no debe resolverse como fecha
+        if not FECHA_ISO.fullmatch(referencia):
+            raise KeyError(f"No existe el snapshot: {referencia}")
+
+        posicion = None
+        for pos, snapshot in enumerate(self.catalogo):
+            if snapshot['fecha'][:len(referencia)] <= referencia:
+                posicion = pos
+        if posicion is None:
+            raise KeyError(f"No hay snapshots en o antes de: {referencia}")
+        return posicion
+
+    def hashes(self, referencia):
+        """
+        Reconstruye el conjunto de hashes de fila de un snapshot
+
+        Parte del último manifiesto completo anterior y aplica los deltas siguientes.
+        """
+        posicion = self._posicion(referencia)
+        base = posicion
+        while self._manifiesto(self.catalogo[base]['id']).get('completo') is None:
+            base -= 1
+
+        vivos = set(self._manifiesto(self.catalogo[base]['id'])['completo'])
+        for pos in range(base + 1, posicion + 1):
+            manifiesto = self._manifiesto(self.catalogo[pos]['id'])
+            vivos.difference_update(manifiesto['eliminados'])
+            vivos.update(manifiesto['agregados'])
+        return vivos
+
+    def guardar(self, csv_file, fecha=None):
+        """
+        Guarda un CSV de salida como nuevo snapshot
+
+        Args:
+            csv_file: CSV generado por el scraper
+            fecha: Fecha ISO del snapshot (por defecto, la fecha de modificación del archivo)
+
+        Returns:
+            Id del snapshot creado
+        """
+        if fecha is None:
+            fecha = datetime.fromtimestamp(os.path.getmtime(csv_file)).isoformat(timespec='seconds')
+        snapshot_id = fecha.replace(':', '').replace('-', '')
+        if any(s['id'] == snapshot_id for s in self.catalogo):
+            raise ValueError(f"Ya existe el snapshot: {snapshot_id}")
+        if self.catalogo and fecha < self.catalogo[-1]['fecha']:
+            raise ValueError(f"El snapshot debe ser posterior a {self.catalogo[-1]['fecha']}")
+
+        indice = self._indice_objetos()
+        actuales = set()
+        nuevas = {}
+
+        for registro in leer_csv(csv_file):
+            valores = [valor.strip() for valor in registro[:-1]]
+            h = hash_fila(valores)
+            actuales.add(h)
+            if h not in indice:
+                nuevas[h] = valores
+
+        anteriores = self.hashes(self.catalogo[-1]['id']) if self.catalogo else set()
+        agregados = actuales - anteriores
+        eliminados = anteriores - actuales
+
+        # Filas del delta guardadas con el manifiesto, para que diff no dependa del
+        # tamaño del catálogo (el primer snapshot no es delta de ningún diff)
+        filas_delta = {}
+        if self.catalogo:
+            filas_delta = self.filas(eliminados)
+            filas_delta.update((h, nuevas[h] if h in nuevas else self._pack(indice[h])[h]) for h in agregados)
+
+        if nuevas:
+            self._write_json(os.path.join(self.packs_dir, f'{snapshot_id}.json.zst'), nuevas)
+            with open(self.indice_file, 'a', encoding='utf-8') as f:
+                for h in nuevas:
+                    f.write(f'{h} {snapshot_id}\n')
+                    indice[h] = snapshot_id
+
+        manifiesto = {
+            'id': snapshot_id,
+            'agregados': sorted(agregados),
+            'eliminados': sorted(eliminados),
+            'filas': filas_delta,
+            'completo': None,
+        }
+        if len(self.catalogo) % CHECKPOINT_CADA == 0:
+            manifiesto['completo'] = sorted(actuales)
+        self._write_json(os.path.join(self.manifiestos_dir, f'{snapshot_id}.json.zst'), manifiesto)
+
+        self.catalogo.append({
+            'id': snapshot_id,
+            'fecha': fecha,
+            'filas': len(actuales),
+            'agregados': len(agregados),
+            'eliminados': len(eliminados),
+            'filas_nuevas': len(nuevas),
+        })
+        self._save_catalogo()
+        return snapshot_id
+
+    def filas(self, hashes):
+        """Devuelve las filas (hash -> valores) de un conjunto de hashes"""
+        indice = self._indice_objetos()
+        return {h: self._pack(indice[h])[h] for h in hashes}
+
+    def snapshot(self, referencia):
+        """
+        Reconstruye las filas de un snapshot (por id o "as of" fecha)
+
+        Returns:
+            Tupla (entrada del catálogo, lista ordenada de valores de cada fila en
+            el orden de CAMPOS_CONTENIDO)
+        """
+        snapshot = self.catalogo[self._posicion(referencia)]
+        return snapshot, sorted(self.filas(self.hashes(snapshot['id'])).values())
+
+    def reconstruir(self, referencia, output_file):
+        """
+        Escribe el CSV de un snapshot (por id o "as of" fecha)
+
+        Returns:
+            Cantidad de filas escritas
+        """
+        snapshot, filas = self.snapshot(referencia)
+
+        return escribir_csv(
+            output_file,
+            (Medicamento(*valores, snapshot['fecha']) for valores in filas)
+        )
+
+    def diff(self, referencia_a, referencia_b):
+        """
+        Diferencias de filas entre dos snapshots, componiendo sólo los deltas entre ambos
+
+        Returns:
+            Diccionario con listas de filas 'agregados', 'eliminados' y pares
+            (antes, despues) 'modificados' (misma clave de producto, distinto contenido)
+        """
+        pos_a = self._posicion(referencia_a)
+        pos_b = self._posicion(referencia_b)
+        invertido = pos_a > pos_b
+        if invertido:
+            pos_a, pos_b = pos_b, pos_a
+
+        deltas = []
+        filas_delta = {}
+        for pos in range(pos_a + 1, pos_b + 1):
+            manifiesto = self._manifiesto(self.catalogo[pos]['id'])
+            deltas.append((manifiesto['agregados'], manifiesto['eliminados']))
+            filas_delta.update(manifiesto.get('filas', {}))
+        agregados, eliminados = componer_deltas(deltas)
+        if invertido:
+            agregados, eliminados = eliminados, agregados
+
+        # Sólo los manifiestos anteriores a las filas por delta requieren el índice y los paquetes
+        faltantes = (agregados | eliminados) - filas_delta.keys()
+        if faltantes:
+            filas_delta.update(self.filas(faltantes))
+        filas_agregadas = {h: filas_delta[h] for h in agregados}
+        filas_eliminadas = {h: filas_delta[h] for h in eliminados}
+
+        def clave(valores):
+            return clave_producto(Medicamento(*valores, ''))
+
+        eliminadas_por_clave = {clave(v): v for v in filas_eliminadas.values()}
+        modificados = []
+        solo_agregados = []
+        for valores in filas_agregadas.values():
+            anterior = eliminadas_por_clave.pop(clave(valores), None)
+            if anterior is not None:
+                modificados.append((anterior, valores))
+            else:
+                solo_agregados.append(valores)
+
+        return {
+            'agregados': sorted(solo_agregados),
+            'eliminados': sorted(eliminadas_por_clave.values()),
+            'modificados': sorted(modificados),
+        }
+
+
+def imprimir_diff(diff, max_items=20):
+    """Imprime el resumen de un diff entre snapshots"""
+    print(f"Agregados: {len(diff['agregados'])}")
+    for valores in diff['agregados'][:max_items]:
+        print(f"  + {valores[0][:60]} ({valores[2][:30]})")
+    print(f"Eliminados: {len(diff['eliminados'])}")
+    for valores in diff['eliminados'][:max_items]:
+        print(f"  - {valores[0][:60]} ({valores[2][:30]})")
+    print(f"Modificados: {len(diff['modificados'])}")
+    for antes, despues in diff['modificados'][:max_items]:
+        cambios = [
+            f"{campo}: {a!r} -> {d!r}"
+            for campo, a, d in zip(CAMPOS_CONTENIDO, antes, despues) if a != d
+        ]
+        print(f"  * {despues[0][:60]}: {'; '.join(cambios)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Historial de snapshots del vademecum de ANMAT")
+    parser.add_argument('--dir', default='snapshots', help="Directorio del almacén")
+    sub = parser.add_subparsers(dest='comando', required=True)
+
+    p = sub.add_parser('guardar', help="Guarda un CSV como nuevo snapshot")
+    p.add_argument('csv_file')
+    p.add_argument('--fecha', help="Fecha ISO del snapshot")
+
+    sub.add_parser('listar', help="Lista los snapshots guardados")
+
+    p = sub.add_parser('reconstruir', help="Reconstruye el CSV de un snapshot (id o fecha)")
+    p.add_argument('referencia')
+    p.add_argument('output_file')
+
+    p = sub.add_parser('diff', help="Diferencias entre dos snapshots (id o fecha)")
+    p.add_argument('referencia_a')
+    p.add_argument('referencia_b')
+
+    args = parser.parse_args()
+    almacen = AlmacenSnapshots(args.dir)
+
+    if args.comando == 'guardar':
+        snapshot_id = almacen.guardar(args.csv_file, fecha=args.fecha)
+        snapshot = almacen.catalogo[-1]
+        print(f"Snapshot {snapshot_id}: {snapshot['filas']} filas, "
+              f"+{snapshot['agregados']} -{snapshot['eliminados']}, {snapshot['filas_nuevas']} filas nuevas")
+    elif args.comando == 'listar':
+        for snapshot in almacen.catalogo:
+            print(f"{snapshot['id']}  {snapshot['fecha']}  {snapshot['filas']:7d} filas  "
+                  f"+{snapshot['agregados']} -{snapshot['eliminados']}")
+    elif args.comando == 'reconstruir':
+        filas = almacen.reconstruir(args.referencia, args.output_file)
+        print(f"{filas} filas escritas en {args.output_file}")
+    else:
+        imprimir_diff(almacen.diff(args.referencia_a, args.referencia_b))
+
+
+if __name__ == "__main__":
+    main()
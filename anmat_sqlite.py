@@ -0,0 +1,128 @@
+"""
+ANMAT Vademecum - Salida SQLite
+Salida opcional con un registro por producto (upsert por clave de producto), para que
+reprocesar un laboratorio no duplique filas. Usa WAL para poder consultar la base
+mientras el crawl sigue escribiendo.
+"""
+
+import argparse
+import sqlite3
+import time
+from itertools import groupby
+
+from anmat_registro import CAMPOS, leer_csv
+
+
+# Columnas de contenido (sin Timestamp_Extraccion, que se guarda como first_seen/last_seen)
+COLUMNAS = CAMPOS[:-1]
+
+# Clave de producto (ver anmat_registro.clave_producto)
+CLAVE = ('Numero_Certificado', 'GTIN', 'Nombre_Comercial_Presentacion')
+
+ESQUEMA = f"""
+CREATE TABLE IF NOT EXISTS medicamentos (
+    {', '.join(f"{columna} TEXT NOT NULL" for columna in COLUMNAS)},
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL,
+    PRIMARY KEY ({', '.join(CLAVE)})
+);
+-- La clave primaria empieza por Numero_Certificado y también sirve para buscarlo
+CREATE INDEX IF NOT EXISTS idx_medicamentos_gtin ON medicamentos (GTIN);
+CREATE INDEX IF NOT EXISTS idx_medicamentos_laboratorio ON medicamentos (Laboratorio);
+"""
+
+UPSERT = f"""
+INSERT INTO medicamentos ({', '.join(COLUMNAS)}, first_seen, last_seen)
+VALUES ({', '.join('?' for _ in COLUMNAS)}, ?, ?)
+ON CONFLICT ({', '.join(CLAVE)}) DO UPDATE SET
+    {', '.join(f"{columna} = excluded.{columna}" for columna in COLUMNAS if columna not in CLAVE)},
+    first_seen = MIN(first_seen, excluded.first_seen),
+    last_seen = MAX(last_seen, excluded.last_seen)
+"""
+
+
+def conectar(db_file):
+    """
+    Abre la base y crea el esquema si no existe
+
+    Args:
+        db_file: Archivo SQLite
+
+    Returns:
+        Conexión sqlite3 en modo WAL
+    """
+    conn = sqlite3.connect(db_file)
+    # WAL: los lectores no bloquean al crawl ni el crawl a los lectores
+    conn.execute("PRAGMA journal_mode=WAL")
+    # Con WAL, NORMAL sólo sincroniza en los checkpoints y no arriesga la consistencia
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(ESQUEMA)
+    return conn
+
+
+class SalidaSQLite:
+    def __init__(self, db_file):
+        """
+        Inicializa la salida SQLite
+
+        Args:
+            db_file: Archivo SQLite (se crea si no existe)
+        """
+        self.db_file = db_file
+        self.conn = conectar(db_file)
+
+    def guardar(self, registros):
+        """
+        Inserta o actualiza registros, en una transacción por página
+
+        Los registros de una misma página comparten Timestamp_Extraccion. Volver a
+        guardar los mismos registros no agrega filas: sólo actualiza last_seen.
+
+        Args:
+            registros: Lista de Medicamento
+
+        Returns:
+            Cantidad de páginas (transacciones) escritas
+        """
+        paginas = 0
+        for timestamp, pagina in groupby(registros, key=lambda registro: registro.Timestamp_Extraccion):
+            with self.conn:
+                self.conn.executemany(UPSERT, (registro[:-1] + (timestamp, timestamp) for registro in pagina))
+            paginas += 1
+        return paginas
+
+    def total(self):
+        """Cantidad de productos en la base"""
+        return self.conn.execute("SELECT COUNT(*) FROM medicamentos").fetchone()[0]
+
+    def close(self):
+        """Cierra la conexión"""
+        self.conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Carga un CSV de salida del scraper en la base SQLite")
+    parser.add_argument('csv_file', help="CSV de salida del scraper")
+    parser.add_argument('db_file', help="Archivo SQLite de destino")
+    args = parser.parse_args()
+
+    salida = SalidaSQLite(args.db_file)
+    inicio = time.perf_counter()
+    filas = 0
+    paginas = 0
+    lote = []
+    for registro in leer_csv(args.csv_file):
+        filas += 1
+        lote.append(registro)
+        if len(lote) >= 1000:
+            paginas += salida.guardar(lote)
+            lote = []
+    paginas += salida.guardar(lote)
+
+    print(f"{filas} filas ({paginas} transacciones) en {time.perf_counter() - inicio:.2f} s")
+    print(f"Productos en {args.db_file}: {salida.total()}")
+    salida.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -6,48 +6,32 @@ Script wrapper para ejecutar el scraper de forma robusta
 import sys
 import time
 import subprocess
-import re
 from pathlib import Path
 
-def extract_last_processed(log_text):
-    """Extrae el último laboratorio procesado del log"""
-    match = re.search(r"start_from='([^']+)'", log_text)
-    if match:
-        return match.group(1)
-    return None
+# Código de salida de anmat_cli.py cuando cambió la estructura de la página
+EXIT_SELECTORES = 4
 
-def run_scraper(start_from=None):
-    """Ejecuta el scraper"""
+def run_scraper(resume=False):
+    """
+    Ejecuta el scraper en un proceso aparte
+
+    Args:
+        resume: Si True, reanuda desde el último laboratorio registrado en el archivo de progreso
+
+    Returns:
+        True si se procesaron todos los laboratorios, None si la estructura de la
+        página cambió (no tiene sentido reintentar), False en otro caso
+    """
     script_dir = Path(__file__).parent
-    script_path = script_dir / "anmat_scraper_v2.py"
+    cli_path = script_dir / "anmat_cli.py"
     
-    if not script_path.exists():
-        print(f"Error: No se encontró {script_path}")
-        return False
+    cmd = [sys.executable, str(cli_path), "resume" if resume else "crawl", "--headless", "--delay", "0.5"]
     
-    # Crear comando de Python
-    if start_from:
-        cmd = f"""
-import sys
-sys.path.insert(0, r'{script_dir}')
-from anmat_scraper_v2 import ANMATScraperV2
-scraper = ANMATScraperV2(headless=True, delay=0.5)
-scraper.run(start_from='{start_from.replace("'", "")}')
-"""
-    else:
-        cmd = f"""
-import sys
-sys.path.insert(0, r'{script_dir}')
-from anmat_scraper_v2 import ANMATScraperV2
-scraper = ANMATScraperV2(headless=True, delay=0.5)
-scraper.run()
-"""
-    
-    print(f"Ejecutando scraper{' desde: ' + start_from if start_from else ''}...")
+    print(f"Ejecutando scraper{' (reanudando)' if resume else ''}...")
     
     try:
         result = subprocess.run(
-            [sys.executable, "-c", cmd],
+            cmd,
             cwd=str(script_dir),
             capture_output=True,
             text=True,
@@ -57,35 +41,42 @@ scraper.run()
         output = result.stdout + result.stderr
         print(output)
         
-        return extract_last_processed(output)
+        if result.returncode == EXIT_SELECTORES:
+            return None
+        return result.returncode == 0
         
     except subprocess.TimeoutExpired:
         print("Script excedió el timeout de 2 horas")
-        return None
+        return False
     except Exception as e:
         print(f"Error ejecutando script: {e}")
-        return None
+        return False
 
 def main():
     print("=" * 70)
     print("ANMAT Scraper - Ejecutor Robusto")
     print("=" * 70)
     
+    cli_path = Path(__file__).parent / "anmat_cli.py"
+    if not cli_path.exists():
+        print(f"Error: No se encontró {cli_path}")
+        return
+    
     max_retries = 10
-    current_start = None
     
     for attempt in range(1, max_retries + 1):
         print(f"\nIntento {attempt}/{max_retries}")
-        last_processed = run_scraper(current_start)
+        completado = run_scraper(resume=attempt > 1)
         
-        if last_processed:
-            print(f"Se completó hasta: {last_processed}")
-            print("Reanudando desde ese punto...")
-            current_start = last_processed
-            time.sleep(5)  # Pequeña pausa entre reintentos
-        else:
+        if completado:
             print("Scraper completado exitosamente!")
             break
+        if completado is None:
+            print("La estructura de la pagina cambio: revisar los selectores antes de reintentar")
+            break
+
+        print("Reanudando desde el ultimo laboratorio procesado...")
+        time.sleep(5)  # Pequeña pausa entre reintentos
     
     print("\n" + "=" * 70)
     print("Ejecución finalizada")
@@ -10,7 +10,7 @@ import time
 # Agregar directorio actual al path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from anmat_scraper_v2 import ANMATScraperV2
+from anmat_cli import main as cli_main
 
 def main():
     print("=" * 70)
@@ -18,18 +18,20 @@ def main():
     print("=" * 70)
     
     try:
-        scraper = ANMATScraperV2(
-            laboratorios_file='LaboratoriosANMAT.txt',
-            output_file='medicamentos_anmat_completo.csv',
-            headless=True,
-            delay=0.5
-        )
-        
         # Ejecutar scraper
         print("\nIniciando scraper...")
-        scraper.run()
+        exit_code = cli_main([
+            'crawl',
+            '--laboratorios-file', 'LaboratoriosANMAT.txt',
+            '--output', 'medicamentos_anmat_completo.csv',
+            '--headless',
+            '--delay', '0.5'
+        ])
         
-        print("\n¡Scraper completado exitosamente!")
+        if exit_code == 0:
+            print("\n¡Scraper completado exitosamente!")
+        else:
+            sys.exit(exit_code)
         
     except KeyboardInterrupt:
         print("\n\nScraper interrumpido por el usuario")